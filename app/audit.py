@@ -0,0 +1,223 @@
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table, and_, inspect, or_
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateIndex, CreateTable, DropTable
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+import base64
+import logging
+import re
+import threading
+import os
+from .database import engine
+
+logger = logging.getLogger(__name__)
+
+# 日志按月分表存储（logs_YYYYMM），保留最近若干个月，过期的整表删除
+LOG_RETENTION_MONTHS = int(os.getenv("LOG_RETENTION_MONTHS", "6"))
+# 后台维护任务的执行间隔（秒）：预建分表并删除过期分表
+LOG_MAINTENANCE_SECONDS = int(os.getenv("LOG_MAINTENANCE_SECONDS", "3600"))
+PARTITION_PATTERN = re.compile(r"^logs_(\d{4})(\d{2})$")
+
+_metadata = MetaData()
+_tables = {}
+_known_partitions = set()
+_lock = threading.Lock()
+
+def _month_start(dt: datetime) -> datetime:
+    return datetime(dt.year, dt.month, 1)
+
+def _add_months(dt: datetime, months: int) -> datetime:
+    index = dt.year * 12 + dt.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+def partition_name(dt: datetime) -> str:
+    return f"logs_{dt:%Y%m}"
+
+def _partition_month(name: str) -> Optional[datetime]:
+    match = PARTITION_PATTERN.match(name)
+    if not match:
+        return None
+    return datetime(int(match.group(1)), int(match.group(2)), 1)
+
+def partition_table(name: str) -> Table:
+    """获取分表定义；分表不建外键，删除用户后其日志仍保留到过期"""
+    with _lock:
+        table = _tables.get(name)
+        if table is None:
+            table = Table(
+                name,
+                _metadata,
+                Column("id", Integer, primary_key=True),
+                Column("user_id", String(36)),
+                Column("action", String(255), nullable=False),
+                Column("timestamp", DateTime, nullable=False),
+                Index(f"ix_{name}_user_id_timestamp", "user_id", "timestamp"),
+                Index(f"ix_{name}_action_timestamp", "action", "timestamp"),
+                Index(f"ix_{name}_timestamp", "timestamp"),
+            )
+            _tables[name] = table
+        return table
+
+def _create_partition(conn, table: Table) -> None:
+    # 多个进程可能同时建同一个分表（如刚跨月时的首次写入），建表和索引都使用 IF NOT EXISTS
+    conn.execute(CreateTable(table, if_not_exists=True))
+    for index in table.indexes:
+        conn.execute(CreateIndex(index, if_not_exists=True))
+
+def list_partitions(bind) -> List[str]:
+    """按时间从新到旧列出已存在的分表"""
+    names = [name for name in inspect(bind).get_table_names() if PARTITION_PATTERN.match(name)]
+    return sorted(names, reverse=True)
+
+def maintain_partitions(now: Optional[datetime] = None) -> List[str]:
+    """维护任务：预建当月和下月分表，整表删除超过保留期的分表，返回被删除的分表名"""
+    now = now or datetime.utcnow()
+    current = _month_start(now)
+    oldest_kept = _add_months(current, -LOG_RETENTION_MONTHS + 1)
+    dropped = []
+    with engine.begin() as conn:
+        for month in (current, _add_months(current, 1)):
+            _create_partition(conn, partition_table(partition_name(month)))
+        for name in list_partitions(conn):
+            if _partition_month(name) < oldest_kept:
+                conn.execute(DropTable(partition_table(name), if_exists=True))
+                dropped.append(name)
+        existing = set(list_partitions(conn))
+    with _lock:
+        _known_partitions.clear()
+        _known_partitions.update(existing)
+    return dropped
+
+class PartitionMaintainer:
+    """定期执行 maintain_partitions 的后台线程
+
+    每个进程各自运行：建表和删表都是幂等的，同时也会刷新本进程的已知分表
+    """
+
+    def __init__(self, interval: int):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="log-partition-maintenance", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                dropped = maintain_partitions()
+                if dropped:
+                    logger.info(f"Dropped expired log partitions: {', '.join(dropped)}")
+            except Exception:
+                logger.exception("Failed to maintain log partitions")
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """停止后台线程，最多等待 timeout 秒"""
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout)
+            if thread.is_alive():
+                logger.warning(f"Log partition maintenance did not stop within {timeout}s")
+
+maintainer = PartitionMaintainer(LOG_MAINTENANCE_SECONDS)
+
+def _partition_for(db: Session, timestamp: datetime) -> Table:
+    name = partition_name(timestamp)
+    table = partition_table(name)
+    if name not in _known_partitions:
+        if name in list_partitions(db.connection()):
+            with _lock:
+                _known_partitions.add(name)
+        else:
+            # 维护任务尚未预建该分表（如刚跨月），在当前事务中补建，提交前不记入已知分表
+            _create_partition(db.connection(), table)
+    return table
+
+def record(db: Session, user_id: Optional[str], action: str, timestamp: Optional[datetime] = None) -> None:
+    """在当前会话的事务中写入一条日志，随请求一起提交"""
+    timestamp = timestamp or datetime.utcnow()
+    table = _partition_for(db, timestamp)
+    db.execute(table.insert().values(user_id=user_id, action=action, timestamp=timestamp))
+
+def record_many(db: Session, user_ids: List[str], action: str, timestamp: Optional[datetime] = None) -> None:
+    """批量操作的日志：每个用户一条，一次 executemany 写入"""
+    if not user_ids:
+        return
+    timestamp = timestamp or datetime.utcnow()
+    table = _partition_for(db, timestamp)
+    db.execute(table.insert(), [
+        {"user_id": user_id, "action": action, "timestamp": timestamp} for user_id in user_ids
+    ])
+
+def _to_naive_utc(dt: Optional[datetime]) -> Optional[datetime]:
+    if dt is None or dt.tzinfo is None:
+        return dt
+    return dt.astimezone(timezone.utc).replace(tzinfo=None)
+
+def encode_cursor(timestamp: datetime, log_id: int) -> str:
+    raw = f"{timestamp.isoformat()}|{log_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """解析分页游标，格式错误时抛出 ValueError"""
+    try:
+        timestamp, log_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(timestamp), int(log_id)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+def query_logs(
+    db: Session,
+    user_id: Optional[str] = None,
+    action: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+):
+    """按用户、操作和时间范围查询日志，按时间倒序，使用 (timestamp, id) 游标分页
+
+    只扫描时间范围内的分表，每个分表内的查询可以走 (user_id, timestamp) 等复合索引
+    """
+    start, end = _to_naive_utc(start), _to_naive_utc(end)
+    after = decode_cursor(cursor) if cursor else None
+    upper = after[0] if after else end
+    items = []
+    for name in list_partitions(db.connection()):
+        month = _partition_month(name)
+        if upper is not None and month > upper:
+            continue
+        if start is not None and _add_months(month, 1) <= _month_start(start):
+            break
+
+        table = partition_table(name)
+        query = table.select()
+        if user_id is not None:
+            query = query.where(table.c.user_id == user_id)
+        if action is not None:
+            query = query.where(table.c.action == action)
+        if start is not None:
+            query = query.where(table.c.timestamp >= start)
+        if end is not None:
+            query = query.where(table.c.timestamp < end)
+        if after is not None:
+            query = query.where(or_(
+                table.c.timestamp < after[0],
+                and_(table.c.timestamp == after[0], table.c.id < after[1]),
+            ))
+        query = query.order_by(table.c.timestamp.desc(), table.c.id.desc()).limit(limit + 1 - len(items))
+
+        items.extend(dict(row._mapping) for row in db.execute(query))
+        if len(items) > limit:
+            break
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1]["timestamp"], items[-1]["id"])
+    return {"items": items, "next_cursor": next_cursor}
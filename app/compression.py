@@ -0,0 +1,201 @@
+from typing import Callable, List, Optional, Sequence
+import zlib
+import os
+
+# brotli 和 zstandard 为可选依赖（pip install brotli zstandard），未安装时只使用gzip
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# 响应体小于该字节数时不压缩
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+# 按优先级排列的可用编码，客户端同时支持时选择靠前的
+COMPRESSION_ENCODINGS = [e.strip() for e in os.getenv("COMPRESSION_ENCODINGS", "br,zstd,gzip").split(",") if e.strip()]
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+COMPRESSION_ZSTD_LEVEL = int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3"))
+# 不压缩的路径前缀，逗号分隔
+COMPRESSION_EXCLUDE_PATHS = [p.strip() for p in os.getenv("COMPRESSION_EXCLUDE_PATHS", "").split(",") if p.strip()]
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml")
+
+def no_compression(endpoint: Callable) -> Callable:
+    """路由装饰器：该接口的响应不压缩
+
+    用于响应中同时包含密钥（如token）和用户可控内容的接口，避免BREACH类攻击
+    """
+    endpoint.__no_compression__ = True
+    return endpoint
+
+class _GzipCompressor:
+    def __init__(self):
+        self._obj = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+class _BrotliCompressor:
+    def __init__(self):
+        self._obj = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data)
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+class _ZstdCompressor:
+    def __init__(self):
+        self._obj = zstandard.ZstdCompressor(level=COMPRESSION_ZSTD_LEVEL).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+def available_encodings(preferred: Sequence[str]) -> List[str]:
+    installed = {"gzip": True, "br": brotli is not None, "zstd": zstandard is not None}
+    return [encoding for encoding in preferred if installed.get(encoding)]
+
+_COMPRESSORS = {"gzip": _GzipCompressor, "br": _BrotliCompressor, "zstd": _ZstdCompressor}
+
+def parse_accept_encoding(value: str) -> dict:
+    """解析Accept-Encoding请求头，返回 {编码: q值}"""
+    accepted = {}
+    for item in value.split(","):
+        parts = item.strip().split(";")
+        name = parts[0].strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in parts[1:]:
+            key, _, val = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(val)
+                except ValueError:
+                    q = 0.0
+        accepted[name] = q
+    return accepted
+
+class CompressionMiddleware:
+    """响应压缩中间件（ASGI）
+
+    按服务端优先级在客户端接受的编码中选择 br / zstd / gzip，
+    只压缩可压缩的内容类型且大于阈值的响应，已编码的响应和 no_compression 标记的接口跳过
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = COMPRESSION_MIN_SIZE,
+        encodings: Optional[Sequence[str]] = None,
+        exclude_paths: Optional[Sequence[str]] = None,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = available_encodings(encodings or COMPRESSION_ENCODINGS)
+        self.exclude_paths = tuple(exclude_paths if exclude_paths is not None else COMPRESSION_EXCLUDE_PATHS)
+
+    def _select_encoding(self, scope) -> Optional[str]:
+        for key, value in scope["headers"]:
+            if key == b"accept-encoding":
+                accepted = parse_accept_encoding(value.decode("latin-1"))
+                for encoding in self.encodings:
+                    if accepted.get(encoding, accepted.get("*", 0)) > 0:
+                        return encoding
+                return None
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (self.exclude_paths and scope["path"].startswith(self.exclude_paths)):
+            await self.app(scope, receive, send)
+            return
+        encoding = self._select_encoding(scope)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressionResponder(self, scope, encoding, send)(receive)
+
+class _CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, scope, encoding: str, send):
+        self.middleware = middleware
+        self.scope = scope
+        self.encoding = encoding
+        self.send = send
+        self.start_message = None
+        self.compressor = None
+        self.passthrough = False
+
+    async def __call__(self, receive):
+        await self.middleware.app(self.scope, receive, self.send_wrapper)
+
+    def _should_skip(self, headers) -> bool:
+        # 路由匹配后 scope 中带有 endpoint，可据此判断接口是否关闭了压缩
+        endpoint = self.scope.get("endpoint")
+        if getattr(endpoint, "__no_compression__", False):
+            return True
+        content_type = ""
+        for key, value in headers:
+            if key == b"content-encoding":
+                return True
+            if key == b"content-type":
+                content_type = value.decode("latin-1")
+        return not content_type.startswith(COMPRESSIBLE_TYPES)
+
+    def _start_headers(self, body_length: Optional[int]):
+        headers = [(k, v) for k, v in self.start_message["headers"] if k != b"content-length"]
+        headers.append((b"content-encoding", self.encoding.encode()))
+        headers.append((b"vary", b"Accept-Encoding"))
+        if body_length is not None:
+            headers.append((b"content-length", str(body_length).encode()))
+        return {**self.start_message, "headers": headers}
+
+    async def send_wrapper(self, message):
+        if message["type"] == "http.response.start":
+            if self._should_skip(message.get("headers", [])):
+                self.passthrough = True
+                await self.send(message)
+            else:
+                # 先缓存响应头，拿到响应体后再决定是否压缩
+                self.start_message = message
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            if not more_body:
+                # 一次性响应：小于阈值直接原样返回
+                if len(body) < self.middleware.minimum_size:
+                    self.passthrough = True
+                    await self.send(self.start_message)
+                    await self.send(message)
+                    return
+                compressor = _COMPRESSORS[self.encoding]()
+                compressed = compressor.compress(body) + compressor.finish()
+                await self.send(self._start_headers(len(compressed)))
+                await self.send({"type": "http.response.body", "body": compressed})
+                return
+            # 流式响应：长度未知，逐块压缩
+            self.compressor = _COMPRESSORS[self.encoding]()
+            await self.send(self._start_headers(None))
+
+        chunk = self.compressor.compress(body)
+        if not more_body:
+            chunk += self.compressor.finish()
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
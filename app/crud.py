@@ -1,12 +1,49 @@
+from sqlalchemy import delete, func, insert, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from . import models, schemas, auth
+from .role_catalog import catalog
 from datetime import datetime, timedelta
 from typing import Optional, List
+import os
+
+# 写操作只flush不提交：同一请求内的所有修改由 deps.UnitOfWorkRoute 在返回前统一提交一次，
+# 新增记录的服务端默认值通过 INSERT ... RETURNING 取回，不再 refresh
+
+# 开启后用户名不区分大小写（依赖 lower(username) 唯一索引，见 init_db.ensure_indexes）
+USERNAME_CASE_INSENSITIVE = os.getenv("USERNAME_CASE_INSENSITIVE", "0") == "1"
+
+class UsernameAlreadyExists(Exception):
+    """用户名已被占用（违反唯一索引）"""
+
+class RoleAlreadyExists(Exception):
+    """角色名已被占用（违反唯一约束）"""
+
+class PermissionAlreadyExists(Exception):
+    """权限名已被占用（违反唯一约束）"""
+
+def _flush_unique(db: Session, column: str, error: type) -> None:
+    """写入变更，名称冲突由数据库唯一约束判定：错误信息中包含该列名时回滚并抛出 error"""
+    try:
+        db.flush()
+    except IntegrityError as e:
+        db.rollback()
+        if column in str(e.orig).lower():
+            raise error() from e
+        raise
+
+def _flush_user(db: Session) -> None:
+    """写入用户变更，用户名冲突由数据库唯一索引判定，不做先查后写"""
+    _flush_unique(db, "username", UsernameAlreadyExists)
 
 def get_user(db: Session, user_id: str):
-    return db.query(models.User).filter(models.User.id == user_id).first()
+    # 按主键获取，已在会话中的对象（如当前登录用户）不再查库
+    return db.get(models.User, user_id)
 
 def get_user_by_username(db: Session, username: str):
+    if USERNAME_CASE_INSENSITIVE:
+        # 两边都在数据库中转小写：SQLite 的 lower() 只处理ASCII字母，与Python的 str.lower() 结果不同
+        return db.query(models.User).filter(func.lower(models.User.username) == func.lower(username)).first()
     return db.query(models.User).filter(models.User.username == username).first()
 
 def get_users(db: Session, skip: int = 0, limit: int = 100):
@@ -19,12 +56,13 @@ def create_user(db: Session, user: schemas.UserCreate):
         hashed_password=hashed_password
     )
     # 查找user角色并赋予
-    user_role = db.query(models.Role).filter_by(name="user").first()
+    user_role = get_role_by_name(db, "user")
     if user_role:
         db_user.roles.append(user_role)
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    _flush_user(db)
+    # 注册请求没有登录用户，以新用户作为本次写入的主体，使其随后的读请求在短时间内走主库
+    db.info.setdefault("principal", db_user.username)
     return db_user
 
 def authenticate_user(db: Session, username: str, password: str):
@@ -39,8 +77,7 @@ def verify_user(db: Session, user_id: str):
     user = get_user(db, user_id)
     if user:
         user.is_active = True
-        db.commit()
-        db.refresh(user)
+        db.flush()
     return user
 
 
@@ -57,8 +94,7 @@ def update_user(db: Session, user_id: str, user_update: schemas.UserUpdate):
     for field, value in update_data.items():
         setattr(user, field, value)
     
-    db.commit()
-    db.refresh(user)
+    _flush_user(db)
     return user
 
 def delete_user(db: Session, user_id: str):
@@ -68,7 +104,7 @@ def delete_user(db: Session, user_id: str):
         return None
     
     db.delete(user)
-    db.commit()
+    db.flush()
     return user
 
 def get_users_with_pagination(db: Session, skip: int = 0, limit: int = 100):
@@ -87,19 +123,15 @@ def create_user_by_admin(db: Session, user: schemas.AdminUserCreate):
     
     # 添加指定的角色
     if user.roles:
-        for role_id in user.roles:
-            role = get_role(db, role_id)
-            if role:
-                db_user.roles.append(role)
+        db_user.roles.extend(get_roles_by_ids(db, user.roles))
     else:
         # 默认添加user角色
-        user_role = db.query(models.Role).filter_by(name="user").first()
+        user_role = get_role_by_name(db, "user")
         if user_role:
             db_user.roles.append(user_role)
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    _flush_user(db)
     return db_user
 
 def update_user_by_admin(db: Session, user_id: str, user_update: schemas.AdminUserUpdate):
@@ -116,49 +148,190 @@ def update_user_by_admin(db: Session, user_id: str, user_update: schemas.AdminUs
     
     # 处理角色更新
     if "roles" in update_data:
-        user.roles.clear()
-        for role_id in update_data.pop("roles"):
-            role = get_role(db, role_id)
-            if role:
-                user.roles.append(role)
+        user.roles = get_roles_by_ids(db, update_data.pop("roles"))
     
     # 更新其他字段
     for field, value in update_data.items():
         setattr(user, field, value)
     
-    db.commit()
-    db.refresh(user)
+    _flush_user(db)
     return user
 
+# 批量操作，单个 IN 列表的长度上限，避免超过SQLite的参数个数限制
+BATCH_CHUNK_SIZE = 500
+
+def _chunks(items: List[str], size: int = BATCH_CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def select_user_ids(db: Session, selector: schemas.BatchUserSelector) -> List[str]:
+    """解析批量操作的目标用户，返回存在的用户id"""
+    if selector.user_ids:
+        found = set()
+        for chunk in _chunks(list(dict.fromkeys(selector.user_ids))):
+            found.update(
+                user_id for (user_id,) in
+                db.query(models.User.id).filter(models.User.id.in_(chunk)).all()
+            )
+        return [user_id for user_id in dict.fromkeys(selector.user_ids) if user_id in found]
+
+    query = db.query(models.User.id)
+    if selector.username_prefix is not None:
+        query = query.filter(models.User.username.startswith(selector.username_prefix, autoescape=True))
+    if selector.is_active is not None:
+        query = query.filter(models.User.is_active == selector.is_active)
+    return [user_id for (user_id,) in query.all()]
+
+def set_users_active(db: Session, user_ids: List[str], is_active: bool) -> int:
+    """批量启用/禁用用户，一个事务内完成"""
+    count = 0
+    for chunk in _chunks(user_ids):
+        result = db.execute(
+            update(models.User)
+            .where(models.User.id.in_(chunk))
+            .values(is_active=is_active)
+            .execution_options(synchronize_session=False)
+        )
+        count += result.rowcount
+    return count
+
+def assign_roles_to_users(db: Session, user_ids: List[str], role_ids: List[int]) -> int:
+    """批量为用户追加角色，已有的关联跳过，返回新增的关联数"""
+    role_ids = catalog.filter_ids(db, role_ids)
+    if not role_ids or not user_ids:
+        return 0
+
+    rows = []
+    for chunk in _chunks(user_ids):
+        existing = set(
+            db.query(models.user_role.c.user_id, models.user_role.c.role_id)
+            .filter(models.user_role.c.user_id.in_(chunk), models.user_role.c.role_id.in_(role_ids))
+            .all()
+        )
+        rows.extend(
+            {"user_id": user_id, "role_id": role_id}
+            for user_id in chunk for role_id in role_ids
+            if (user_id, role_id) not in existing
+        )
+    if rows:
+        db.execute(insert(models.user_role), rows)
+    return len(rows)
+
+def delete_users(db: Session, user_ids: List[str]) -> int:
+    """批量删除用户及其角色关联"""
+    count = 0
+    for chunk in _chunks(user_ids):
+        db.execute(delete(models.user_role).where(models.user_role.c.user_id.in_(chunk)))
+        result = db.execute(
+            delete(models.User)
+            .where(models.User.id.in_(chunk))
+            .execution_options(synchronize_session=False)
+        )
+        count += result.rowcount
+    return count
+
 # 角色和权限相关的CRUD操作
 def create_role(db: Session, role: schemas.RoleCreate):
     db_role = models.Role(
         name=role.name,
         description=role.description
     )
+    if role.permissions:
+        db_role.permissions = get_permissions_by_ids(db, role.permissions)
     db.add(db_role)
-    db.commit()
-    db.refresh(db_role)
+    _flush_unique(db, "name", RoleAlreadyExists)
+    catalog.invalidate_on_commit(db)
     return db_role
 
 def get_role(db: Session, role_id: int):
-    return db.query(models.Role).filter(models.Role.id == role_id).first()
+    return db.get(models.Role, role_id)
+
+def get_role_by_name(db: Session, name: str):
+    """通过角色目录缓存把名称解析为id，再按主键取回（命中会话标识映射时不查库）"""
+    role_id = catalog.get_id(db, name)
+    if role_id is None:
+        return None
+    return db.get(models.Role, role_id)
+
+def get_roles_by_ids(db: Session, role_ids: List[int]) -> List[models.Role]:
+    """按id批量获取角色，不存在的id直接忽略，最多一次 IN 查询"""
+    valid_ids = catalog.filter_ids(db, role_ids)
+    if not valid_ids:
+        return []
+    roles = db.query(models.Role).filter(models.Role.id.in_(valid_ids)).all()
+    roles_by_id = {role.id: role for role in roles}
+    return [roles_by_id[role_id] for role_id in valid_ids if role_id in roles_by_id]
 
 def get_roles(db: Session, skip: int = 0, limit: int = 100):
     return db.query(models.Role).offset(skip).limit(limit).all()
 
+def update_role(db: Session, role_id: int, role_update: schemas.RoleUpdate):
+    role = get_role(db, role_id)
+    if not role:
+        return None
+
+    update_data = role_update.dict(exclude_unset=True)
+    if "permissions" in update_data:
+        role.permissions = get_permissions_by_ids(db, update_data.pop("permissions"))
+
+    for field, value in update_data.items():
+        setattr(role, field, value)
+
+    _flush_unique(db, "name", RoleAlreadyExists)
+    catalog.invalidate_on_commit(db)
+    return role
+
+def delete_role(db: Session, role_id: int):
+    """删除角色，同时解除与用户和权限的关联"""
+    role = get_role(db, role_id)
+    if not role:
+        return None
+
+    db.delete(role)
+    db.flush()
+    catalog.invalidate_on_commit(db)
+    return role
+
 def create_permission(db: Session, permission: schemas.PermissionCreate):
     db_permission = models.Permission(
         name=permission.name,
         description=permission.description
     )
     db.add(db_permission)
-    db.commit()
-    db.refresh(db_permission)
+    _flush_unique(db, "name", PermissionAlreadyExists)
     return db_permission
 
 def get_permission(db: Session, permission_id: int):
-    return db.query(models.Permission).filter(models.Permission.id == permission_id).first()
+    return db.get(models.Permission, permission_id)
+
+def get_permission_by_name(db: Session, name: str):
+    return db.query(models.Permission).filter(models.Permission.name == name).first()
+
+def get_permissions_by_ids(db: Session, permission_ids: List[int]) -> List[models.Permission]:
+    if not permission_ids:
+        return []
+    return db.query(models.Permission).filter(models.Permission.id.in_(permission_ids)).all()
 
 def get_permissions(db: Session, skip: int = 0, limit: int = 100):
     return db.query(models.Permission).offset(skip).limit(limit).all()
+
+def update_permission(db: Session, permission_id: int, permission_update: schemas.PermissionUpdate):
+    permission = get_permission(db, permission_id)
+    if not permission:
+        return None
+
+    for field, value in permission_update.dict(exclude_unset=True).items():
+        setattr(permission, field, value)
+
+    _flush_unique(db, "name", PermissionAlreadyExists)
+    return permission
+
+def delete_permission(db: Session, permission_id: int):
+    """删除权限，同时解除与角色的关联"""
+    permission = get_permission(db, permission_id)
+    if not permission:
+        return None
+
+    db.delete(permission)
+    db.flush()
+    return permission
@@ -1,12 +1,85 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from . import state
+import os
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./Backend.db"
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./Backend.db")
+# 只读副本地址，未设置时所有查询都走主库
+SQLALCHEMY_REPLICA_URL = os.getenv("REPLICA_DATABASE_URL")
+# 用户发生写操作后，在这段时间内其读请求仍走主库，保证读到自己的写入；设为0则不做此保证
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", "5"))
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# 多个worker进程共享同一个SQLite文件时，使用WAL模式让读写互不阻塞，并在锁冲突时等待而不是直接报错
+def _set_sqlite_pragma(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+def _create_engine(url: str):
+    # check_same_thread 和上面的 PRAGMA 只适用于SQLite，其他数据库使用默认参数
+    if make_url(url).get_backend_name() != "sqlite":
+        return create_engine(url)
+    db_engine = create_engine(url, connect_args={"check_same_thread": False})
+    event.listen(db_engine, "connect", _set_sqlite_pragma)
+    return db_engine
+
+def is_busy_error(exc: Exception) -> bool:
+    """SQLite 写锁冲突：等待 busy_timeout 后仍未拿到锁"""
+    if not isinstance(exc, OperationalError):
+        return False
+    message = str(exc.orig).lower()
+    return "database is locked" in message or "database table is locked" in message
+
+engine = _create_engine(SQLALCHEMY_DATABASE_URL)
+replica_engine = _create_engine(SQLALCHEMY_REPLICA_URL) if SQLALCHEMY_REPLICA_URL else engine
+
+def _sticky_key(principal: str) -> str:
+    return f"replica_sticky:{principal}"
+
+class RoutingSession(Session):
+    """按请求类型路由的会话
+
+    info["read_only"] 为真时查询发往只读副本；会话内发生过写入，
+    或 info["use_primary"] 被置位（用户刚写过数据）时改回主库
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.info.get("read_only") and not self.info.get("use_primary") and not self._flushing:
+            return replica_engine
+        return engine
+
+    def stick_to_primary_if_recent_write(self, principal: str) -> None:
+        """记录当前请求的用户，如果该用户最近有写操作则本次请求改走主库"""
+        if replica_engine is engine:
+            return
+        self.info["principal"] = principal
+        if state.get_store().get(_sticky_key(principal)):
+            self.info["use_primary"] = True
+
+@event.listens_for(RoutingSession, "after_flush")
+def _after_flush(session, flush_context):
+    session.info["use_primary"] = True
+    session.info["has_writes"] = True
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _do_orm_execute(orm_execute_state):
+    # 直接执行的批量 UPDATE/DELETE/INSERT 不经过flush，同样视为写操作
+    if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        orm_execute_state.session.info["use_primary"] = True
+        orm_execute_state.session.info["has_writes"] = True
+
+@event.listens_for(RoutingSession, "after_commit")
+def _after_commit(session):
+    principal = session.info.get("principal")
+    has_writes = session.info.pop("has_writes", False)
+    if has_writes and principal and replica_engine is not engine and REPLICA_STICKY_SECONDS > 0:
+        state.get_store().set(_sticky_key(principal), 1, ttl=REPLICA_STICKY_SECONDS)
+
+# 提交后不使对象过期，返回响应时直接使用内存中的状态，不必重新查询
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 Base = declarative_base()
@@ -1,17 +1,80 @@
-from .database import SessionLocal
-from fastapi import Depends, HTTPException, status
+from .database import SessionLocal, is_busy_error
+from fastapi import Depends, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
 from fastapi.security import OAuth2PasswordBearer
-from . import auth, crud, schemas
+from typing import Callable
+import asyncio
+import logging
+import random
+import os
+from . import auth, crud, schemas, sessions
+
+logger = logging.getLogger(__name__)
+
+# 数据库写锁冲突（SQLite database is locked）时整个请求重试的次数，仍失败则返回503
+DB_BUSY_RETRIES = int(os.getenv("DB_BUSY_RETRIES", "2"))
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="users/login")  # 注意tokenUrl要和你的登录接口一致
 
-def get_db():
+def get_db(request: Request):
     db = SessionLocal()
+    # GET/HEAD 请求只读，查询可以发往只读副本
+    db.info["read_only"] = request.method in ("GET", "HEAD")
+    # 供 UnitOfWorkRoute 在返回响应前统一提交或回滚
+    request.state.db = db
     try:
         yield db
     finally:
         db.close()
 
+class UnitOfWorkRoute(APIRoute):
+    """每个请求一个事务：接口成功返回后统一提交一次，抛出异常或返回错误状态码时回滚
+
+    路由和crud中不调用 db.commit()，crud只flush；需要在提交后执行的操作
+    （吊销会话、角色目录失效、保存幂等结果）通过会话的 after_commit 事件完成。
+    遇到写锁冲突时回滚并重新执行整个请求，重试用尽后返回503
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            for attempt in range(DB_BUSY_RETRIES + 1):
+                try:
+                    response = await handler(request)
+                    await _finish(request, commit=response.status_code < 400)
+                    return response
+                except Exception as e:
+                    await _finish(request, commit=False)
+                    if not is_busy_error(e):
+                        raise
+                if attempt < DB_BUSY_RETRIES:
+                    await asyncio.sleep(random.uniform(0.05, 0.2) * (attempt + 1))
+            logger.warning(f"Database busy, giving up on {request.method} {request.url.path}")
+            return JSONResponse(
+                status_code=503,
+                content={"message": "Database is busy, please retry"},
+                headers={"Retry-After": "1"},
+            )
+
+        return route_handler
+
+async def _finish(request: Request, commit: bool) -> None:
+    db = getattr(request.state, "db", None)
+    if db is None:
+        return
+    request.state.db = None
+    if commit:
+        try:
+            await run_in_threadpool(db.commit)
+            return
+        except Exception:
+            await run_in_threadpool(db.rollback)
+            raise
+    await run_in_threadpool(db.rollback)
+
 def get_current_user(token: str = Depends(oauth2_scheme), db=Depends(get_db)) -> schemas.UserOut:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -24,6 +87,13 @@ def get_current_user(token: str = Depends(oauth2_scheme), db=Depends(get_db)) ->
     username: str = payload.get("sub")
     if username is None:
         raise credentials_exception
+    # 旧token没有jti，不参与会话登记和吊销
+    jti = payload.get("jti")
+    if jti is not None:
+        if sessions.is_revoked(jti):
+            raise credentials_exception
+        sessions.registry.touch(jti)
+    db.stick_to_primary_if_recent_write(username)
     user = crud.get_user_by_username(db, username)
     if user is None:
         raise credentials_exception
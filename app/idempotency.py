@@ -0,0 +1,95 @@
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from typing import Any, Optional
+import hashlib
+import hmac
+import os
+from . import auth, state
+from .database import RoutingSession
+
+# 已完成请求的响应保留时长（秒）和最多保留的键数
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "10000"))
+# 处理中的标记的过期时间，防止进程异常退出后该键一直无法使用
+IDEMPOTENCY_PENDING_TTL_SECONDS = 60
+
+def _store():
+    return state.get_store("idempotency", max_entries=IDEMPOTENCY_MAX_KEYS)
+
+def fingerprint(payload: BaseModel) -> str:
+    """请求体指纹；请求体可能含密码，使用HMAC而不是直接哈希"""
+    return hmac.new(auth.SECRET_KEY.encode(), payload.model_dump_json().encode(), hashlib.sha256).hexdigest()
+
+class IdempotencyGuard:
+    """Idempotency-Key 处理
+
+    首次请求登记为处理中，成功后保存响应；相同键和相同请求体的重试直接返回保存的响应，
+    不再执行哈希密码、写库等操作。请求失败时释放该键，客户端可以重试
+    """
+
+    def __init__(self, key: Optional[str], scope: str, payload: BaseModel):
+        self.key = key
+        self.store_key = f"{scope}:{key}"
+        self.fingerprint = fingerprint(payload) if key else None
+        self.replay: Optional[JSONResponse] = None
+        self._owned = False
+
+    def __enter__(self) -> "IdempotencyGuard":
+        if not self.key:
+            return self
+        store = _store()
+        pending = {"state": "pending", "fingerprint": self.fingerprint}
+        if store.add(self.store_key, pending, ttl=IDEMPOTENCY_PENDING_TTL_SECONDS):
+            self._owned = True
+            return self
+
+        entry = store.get(self.store_key)
+        if entry is None:
+            # 刚好过期或被释放，重新登记一次
+            if store.add(self.store_key, pending, ttl=IDEMPOTENCY_PENDING_TTL_SECONDS):
+                self._owned = True
+                return self
+            entry = store.get(self.store_key) or pending
+        if entry["fingerprint"] != self.fingerprint:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was used with a different request")
+        if entry["state"] == "pending":
+            raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is in progress")
+        self.replay = JSONResponse(
+            status_code=entry["status_code"],
+            content=entry["body"],
+            headers={"Idempotent-Replayed": "true"},
+        )
+        return self
+
+    def save(self, db: Session, status_code: int, body: Any) -> None:
+        """登记成功的响应，事务提交后才写入；提交失败回滚时释放该键"""
+        if not self._owned:
+            return
+        db.info.setdefault("idempotency_responses", []).append((self.store_key, {
+            "state": "done",
+            "fingerprint": self.fingerprint,
+            "status_code": status_code,
+            "body": jsonable_encoder(body),
+        }))
+        self._owned = False
+
+    def __exit__(self, exc_type, exc, tb):
+        # 未保存响应就结束（出错）时释放该键
+        if self._owned:
+            _store().delete(self.store_key)
+            self._owned = False
+        return False
+
+@event.listens_for(RoutingSession, "after_commit")
+def _save_responses(session):
+    for store_key, entry in session.info.pop("idempotency_responses", ()):
+        _store().set(store_key, entry, ttl=IDEMPOTENCY_TTL_SECONDS)
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _release_keys(session):
+    for store_key, _ in session.info.pop("idempotency_responses", ()):
+        _store().delete(store_key)
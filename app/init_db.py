@@ -0,0 +1,90 @@
+from sqlalchemy import Index, func
+from .database import Base, engine, SessionLocal
+from . import audit, crud, schemas, models, sessions
+
+# 初始化角色
+def init_roles():
+    with SessionLocal() as db:
+        for role_name, desc in [("user", "普通用户"), ("admin", "管理员")]:
+            if not db.query(crud.models.Role).filter_by(name=role_name).first():
+                crud.create_role(db, schemas.RoleCreate(name=role_name, description=desc))
+        db.commit()
+
+# 初始化默认权限
+def init_default_permissions():
+    with SessionLocal() as db:
+        # 创建默认权限
+        default_permissions = [
+            ("user_read", "查看用户信息"),
+            ("user_write", "修改用户信息"),
+            ("user_delete", "删除用户"),
+            ("admin", "系统管理权限")
+        ]
+        
+        for perm_name, perm_desc in default_permissions:
+            if not db.query(crud.models.Permission).filter_by(name=perm_name).first():
+                crud.create_permission(db, schemas.PermissionCreate(name=perm_name, description=perm_desc))
+        
+        # 为admin角色分配所有权限
+        admin_role = db.query(crud.models.Role).filter_by(name="admin").first()
+        if admin_role:
+            all_permissions = db.query(crud.models.Permission).all()
+            for permission in all_permissions:
+                if permission not in admin_role.permissions:
+                    admin_role.permissions.append(permission)
+        db.commit()
+        
+        print("默认权限初始化完成")
+
+# 创建默认管理员用户
+def create_admin_user():
+    with SessionLocal() as db:
+        # 检查是否已存在admin用户
+        admin_user = crud.get_user_by_username(db, "admin")
+        
+        if not admin_user:
+            # 创建admin角色（如果不存在）
+            admin_role = db.query(crud.models.Role).filter_by(name="admin").first()
+            if not admin_role:
+                admin_role = crud.create_role(db, schemas.RoleCreate(name="admin", description="系统管理员"))
+            
+            # 创建admin用户
+            admin_user_create = schemas.AdminUserCreate(
+                username="admin",
+                password="admin123",  # 默认密码，生产环境应该修改
+                roles=[admin_role.id]
+            )
+            
+            admin_user = crud.create_user_by_admin(db, admin_user_create)
+            db.commit()
+            print(f"已创建默认管理员用户: {admin_user.username}")
+            print("默认密码: admin123")
+            print("请在首次登录后修改密码！")
+        else:
+            print("管理员用户已存在，跳过创建")
+
+# 为已存在的表补建新增的索引（create_all 只会为新建的表创建索引）
+def ensure_indexes():
+    for table in (models.Log.__table__,):
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+    # 用户名不区分大小写时，由 lower(username) 唯一索引保证唯一并加速查询；
+    # 已有仅大小写不同的重名用户时创建会失败，需要先处理这些用户
+    if crud.USERNAME_CASE_INSENSITIVE:
+        Index(
+            "ix_users_username_lower",
+            func.lower(models.User.username),
+            unique=True,
+        ).create(bind=engine, checkfirst=True)
+
+def init_all():
+    """建表并写入初始数据，多进程部署时只应在主进程执行一次"""
+    Base.metadata.create_all(bind=engine)
+    ensure_indexes()
+    audit.maintain_partitions()
+    sessions.purge_expired()
+    sessions.load_revocations()
+    init_roles()
+    init_default_permissions()
+    create_admin_user()
@@ -0,0 +1,59 @@
+from sqlalchemy import text
+from sqlalchemy.pool import QueuePool
+import logging
+import os
+import time
+from . import audit, auth, crud, sessions
+from .database import SessionLocal, engine, replica_engine
+from .role_catalog import catalog
+
+logger = logging.getLogger(__name__)
+
+# 关闭时等待每个后台线程退出的最长秒数，超时只记录日志，不阻塞进程退出
+BACKGROUND_STOP_TIMEOUT = float(os.getenv("BACKGROUND_STOP_TIMEOUT", "10"))
+
+def _warm_pool(db_engine) -> None:
+    # 预先建立连接池中的连接，避免首批请求承担建连开销
+    size = db_engine.pool.size() if isinstance(db_engine.pool, QueuePool) else 1
+    connections = []
+    try:
+        for _ in range(size):
+            conn = db_engine.connect()
+            conn.execute(text("SELECT 1"))
+            connections.append(conn)
+    finally:
+        for conn in connections:
+            conn.close()
+
+def warm_up() -> None:
+    """启动预热：数据库连接池、密码哈希后端、JWT编解码和常用缓存"""
+    started = time.perf_counter()
+    _warm_pool(engine)
+    if replica_engine is not engine:
+        _warm_pool(replica_engine)
+
+    # passlib 在首次使用时才加载bcrypt后端
+    auth.pwd_context.handler("bcrypt").get_backend()
+    # 首次编解码时加载JWT相关模块
+    auth.verify_token(auth.create_access_token({"sub": "warmup"}))
+
+    with SessionLocal() as db:
+        catalog.load(db)
+        # 同时预热查询语句的编译缓存
+        crud.get_user_by_username(db, "admin")
+    logger.info(f"Warm-up finished in {time.perf_counter() - started:.2f}s")
+
+def flush_background() -> None:
+    """停止后台任务，写入剩余数据并关闭数据库连接
+
+    在lifespan关闭阶段调用。此时uvicorn已停止监听并等待进行中的请求完成
+    （最长 --timeout-graceful-shutdown 秒），不会再有新请求
+    """
+    audit.maintainer.stop(timeout=BACKGROUND_STOP_TIMEOUT)
+    try:
+        sessions.registry.stop(timeout=BACKGROUND_STOP_TIMEOUT)
+    except Exception:
+        logger.exception("Failed to flush session last_seen updates on shutdown")
+    engine.dispose()
+    if replica_engine is not engine:
+        replica_engine.dispose()
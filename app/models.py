@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Table
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Table, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from .database import Base
@@ -28,6 +28,9 @@ class User(Base):
     hashed_password = Column(String(255), nullable=False)
     is_active = Column(Boolean, default=True)
     created_time = Column(DateTime(timezone=True), server_default=func.now())
+
+    # 插入时通过 RETURNING 取回服务端默认值，避免提交后再查询
+    __mapper_args__ = {"eager_defaults": True}
     
     # 关联
     roles = relationship("Role", secondary=user_role, back_populates="users")
@@ -40,6 +43,8 @@ class Role(Base):
     description = Column(String(200))
     created_time = Column(DateTime(timezone=True), server_default=func.now())
 
+    __mapper_args__ = {"eager_defaults": True}
+
     # 关联
     users = relationship("User", secondary=user_role, back_populates="roles")
     permissions = relationship("Permission", secondary=role_permission, back_populates="roles")
@@ -52,13 +57,34 @@ class Permission(Base):
     description = Column(String(200))
     created_time = Column(DateTime(timezone=True), server_default=func.now())
 
+    __mapper_args__ = {"eager_defaults": True}
+
     # 关联
     roles = relationship("Role", secondary=role_permission, back_populates="permissions")
 
+class UserSession(Base):
+    """登录会话，对应一个access token（以jti标识）"""
+    __tablename__ = "user_sessions"
+
+    jti = Column(String(32), primary_key=True)
+    # 不建外键：用户被删除后会话记录保留到过期，用于吊销校验
+    user_id = Column(String(36), index=True, nullable=False)
+    created_time = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime, nullable=False)
+    last_seen = Column(DateTime)
+    revoked = Column(Boolean, default=False, nullable=False)
+
+    __mapper_args__ = {"eager_defaults": True}
+
 class Log(Base):
+    """单表日志（旧数据），新日志按月分表写入，见 app/audit.py"""
     __tablename__ = "logs"
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(String(36), ForeignKey("users.id"))
     action = Column(String(255), nullable=False)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_logs_user_id_timestamp", "user_id", "timestamp"),
+    )
\ No newline at end of file
@@ -0,0 +1,143 @@
+from fastapi import FastAPI
+from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html
+from fastapi.openapi.utils import get_openapi
+from fastapi.requests import Request
+from fastapi.responses import Response
+from typing import Optional
+import gzip
+import hashlib
+import json
+import threading
+from .compression import parse_accept_encoding
+
+OPENAPI_URL = "/openapi.json"
+
+TAGS = [
+    {
+        "name": "users",
+        "description": "用户管理相关接口，包括注册、登录、信息管理等"
+    },
+    {
+        "name": "roles",
+        "description": "角色管理接口（管理员）"
+    },
+    {
+        "name": "permissions",
+        "description": "权限管理接口（管理员）"
+    },
+    {
+        "name": "logs",
+        "description": "操作日志查询接口（管理员）"
+    },
+]
+
+def build_openapi_schema(app: FastAPI) -> dict:
+    """根据路由生成OpenAPI文档，只依赖路由定义，不访问数据库"""
+    openapi_schema = get_openapi(
+        title="Attack Monitor Backend API",
+        version="1.0.0",
+        description="攻击监控系统后端API接口",
+        routes=app.routes,
+    )
+
+    # 添加自定义标签说明
+    openapi_schema["tags"] = TAGS
+
+    # 添加安全方案说明
+    components = openapi_schema.setdefault("components", {})
+    components.setdefault("securitySchemes", {})["bearerAuth"] = {
+        "type": "http",
+        "scheme": "bearer",
+        "bearerFormat": "JWT",
+        "description": "JWT Bearer Token认证"
+    }
+
+    # 为需要认证的接口添加安全要求
+    for path, path_item in openapi_schema["paths"].items():
+        for method, operation in path_item.items():
+            if path in ("/users/register", "/users/login"):
+                continue
+            if method.lower() in ["get", "post", "put", "delete"] and "security" not in operation:
+                operation["security"] = [{"bearerAuth": []}]
+
+    return openapi_schema
+
+class OpenAPICache:
+    """缓存序列化后的OpenAPI文档（原文和gzip压缩版），每个进程只生成一次"""
+
+    def __init__(self):
+        self.schema: Optional[dict] = None
+        self.body: bytes = b""
+        self.gzip_body: bytes = b""
+        self.etag: str = ""
+        self.gzip_etag: str = ""
+        self._lock = threading.Lock()
+
+    def build(self, app: FastAPI) -> None:
+        if self.schema is not None:
+            return
+        with self._lock:
+            if self.schema is not None:
+                return
+            schema = build_openapi_schema(app)
+            body = json.dumps(schema, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            self.gzip_body = gzip.compress(body, compresslevel=9)
+            digest = hashlib.sha1(body).hexdigest()
+            # 两种编码是不同的表示，ETag也要区分
+            self.etag = f'"{digest}"'
+            self.gzip_etag = f'"{digest}-gzip"'
+            self.body = body
+            self.schema = schema
+
+    def response(self, request: Request) -> Response:
+        accepted = parse_accept_encoding(request.headers.get("accept-encoding", ""))
+        use_gzip = accepted.get("gzip", accepted.get("*", 0)) > 0
+        etag = self.gzip_etag if use_gzip else self.etag
+        headers = {"ETag": etag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+        if _etag_matches(request.headers.get("if-none-match", ""), etag):
+            return Response(status_code=304, headers=headers)
+        if use_gzip:
+            headers["Content-Encoding"] = "gzip"
+            return Response(self.gzip_body, media_type="application/json", headers=headers)
+        return Response(self.body, media_type="application/json", headers=headers)
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match 使用弱比较：可以是逗号分隔的多个ETag或 *，忽略 W/ 前缀"""
+    for item in if_none_match.split(","):
+        item = item.strip()
+        if item == "*":
+            return True
+        if item.startswith("W/"):
+            item = item[2:]
+        if item == etag:
+            return True
+    return False
+
+cache = OpenAPICache()
+
+def install(app: FastAPI) -> None:
+    """用缓存的文档替换FastAPI默认的 /openapi.json 和文档页面
+
+    创建app时需传入 openapi_url=None, docs_url=None, redoc_url=None
+    """
+
+    def openapi() -> dict:
+        cache.build(app)
+        return cache.schema
+
+    app.openapi = openapi
+
+    @app.get(OPENAPI_URL, include_in_schema=False)
+    async def get_openapi_json(request: Request):
+        # 正常情况下已在启动时生成，这里只是兜底
+        if cache.schema is None:
+            cache.build(app)
+        return cache.response(request)
+
+    @app.get("/docs", include_in_schema=False)
+    async def swagger_ui():
+        return get_swagger_ui_html(openapi_url=OPENAPI_URL, title=f"{app.title} - Swagger UI")
+
+    @app.get("/redoc", include_in_schema=False)
+    async def redoc():
+        return get_redoc_html(openapi_url=OPENAPI_URL, title=f"{app.title} - ReDoc")
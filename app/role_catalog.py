@@ -0,0 +1,75 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional
+import threading
+from . import models, state
+from .database import RoutingSession
+
+# 角色目录版本号，角色变更时自增，各worker据此判断本地缓存是否失效
+VERSION_KEY = "role_catalog_version"
+
+class RoleCatalog:
+    """角色目录缓存（id→名称、名称→id）
+
+    只缓存角色的标识而不缓存ORM对象，ORM对象绑定会话，不能跨请求复用；
+    需要实体时按缓存过滤出有效id后用一次 IN 查询取回
+    """
+
+    def __init__(self):
+        self._by_id: Dict[int, str] = {}
+        self._by_name: Dict[str, int] = {}
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _ensure_loaded(self, db: Session) -> None:
+        version = state.get_store().get(VERSION_KEY, 0)
+        if self._version == version:
+            return
+        with self._lock:
+            if self._version == version:
+                return
+            rows = db.query(models.Role.id, models.Role.name).all()
+            self._by_id = {role_id: name for role_id, name in rows}
+            self._by_name = {name: role_id for role_id, name in rows}
+            self._version = version
+
+    def _snapshot(self, db: Session):
+        if db.info.get("role_catalog_dirty"):
+            # 本会话有未提交的角色变更，直接按会话内的数据解析，不写入共享缓存
+            rows = db.query(models.Role.id, models.Role.name).all()
+            return {role_id: name for role_id, name in rows}, {name: role_id for role_id, name in rows}
+        self._ensure_loaded(db)
+        return self._by_id, self._by_name
+
+    def load(self, db: Session) -> None:
+        self._ensure_loaded(db)
+
+    def get_id(self, db: Session, name: str) -> Optional[int]:
+        return self._snapshot(db)[1].get(name)
+
+    def get_name(self, db: Session, role_id: int) -> Optional[str]:
+        return self._snapshot(db)[0].get(role_id)
+
+    def filter_ids(self, db: Session, role_ids: List[int]) -> List[int]:
+        """过滤掉不存在的角色id，保持顺序并去重"""
+        by_id = self._snapshot(db)[0]
+        return [role_id for role_id in dict.fromkeys(role_ids) if role_id in by_id]
+
+    def invalidate(self) -> None:
+        state.get_store().incr(VERSION_KEY)
+        self._version = None
+
+    def invalidate_on_commit(self, db: Session) -> None:
+        """在会话提交后再使缓存失效，避免其他worker在提交前重新加载到旧数据"""
+        db.info["role_catalog_dirty"] = True
+
+catalog = RoleCatalog()
+
+@event.listens_for(RoutingSession, "after_commit")
+def _invalidate_after_commit(session):
+    if session.info.pop("role_catalog_dirty", False):
+        catalog.invalidate()
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _discard_on_rollback(session):
+    session.info.pop("role_catalog_dirty", None)
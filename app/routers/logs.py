@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Optional
+from .. import schemas, deps, audit
+
+router = APIRouter(prefix="/logs", tags=["logs"], route_class=deps.UnitOfWorkRoute)
+
+@router.get("", response_model=schemas.LogPage, status_code=200)
+def get_logs(
+    user_id: Optional[str] = None,
+    action: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    current_user: schemas.UserOut = Depends(deps.get_current_admin_user),
+    db: Session = Depends(deps.get_db)
+):
+    """管理员按用户、操作和时间范围（UTC，[start, end)）查询日志，按时间倒序分页"""
+    try:
+        return audit.query_logs(db, user_id=user_id, action=action, start=start, end=end, limit=limit, cursor=cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@router.post("/retention", status_code=200)
+def run_log_retention(
+    current_user: schemas.UserOut = Depends(deps.get_current_admin_user)
+):
+    """管理员手动执行日志维护：预建分表并删除超过保留期的分表"""
+    dropped = audit.maintain_partitions()
+    return {"dropped": dropped}
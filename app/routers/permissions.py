@@ -0,0 +1,74 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import List
+from .. import schemas, crud, deps
+
+router = APIRouter(prefix="/permissions", tags=["permissions"], route_class=deps.UnitOfWorkRoute)
+
+@router.get("", response_model=List[schemas.Permission], status_code=200)
+def get_permissions(
+    skip: int = 0,
+    limit: int = 100,
+    current_user: schemas.UserOut = Depends(deps.get_current_admin_user),
+    db: Session = Depends(deps.get_db)
+):
+    """管理员获取权限列表"""
+    return crud.get_permissions(db, skip=skip, limit=limit)
+
+@router.post("", response_model=schemas.Permission, status_code=201)
+def create_permission(
+    permission_data: schemas.PermissionCreate,
+    current_user: schemas.UserOut = Depends(deps.get_current_admin_user),
+    db: Session = Depends(deps.get_db)
+):
+    """管理员创建权限"""
+    # 名称冲突由唯一约束判定，不做先查后写
+    try:
+        permission = crud.create_permission(db, permission_data)
+    except crud.PermissionAlreadyExists:
+        raise HTTPException(status_code=409, detail="Permission already exists")
+    return permission
+
+@router.get("/{permission_id}", response_model=schemas.Permission, status_code=200)
+def get_permission(
+    permission_id: int,
+    current_user: schemas.UserOut = Depends(deps.get_current_admin_user),
+    db: Session = Depends(deps.get_db)
+):
+    """管理员获取指定权限"""
+    permission = crud.get_permission(db, permission_id)
+    if not permission:
+        raise HTTPException(status_code=404, detail="Permission not found")
+    return permission
+
+@router.put("/{permission_id}", response_model=schemas.Permission, status_code=200)
+def update_permission(
+    permission_id: int,
+    permission_update: schemas.PermissionUpdate,
+    current_user: schemas.UserOut = Depends(deps.get_current_admin_user),
+    db: Session = Depends(deps.get_db)
+):
+    """管理员更新权限信息"""
+    permission = crud.get_permission(db, permission_id)
+    if not permission:
+        raise HTTPException(status_code=404, detail="Permission not found")
+
+    try:
+        updated_permission = crud.update_permission(db, permission_id, permission_update)
+    except crud.PermissionAlreadyExists:
+        raise HTTPException(status_code=409, detail="Permission already exists")
+    return updated_permission
+
+@router.delete("/{permission_id}", status_code=200)
+def delete_permission(
+    permission_id: int,
+    current_user: schemas.UserOut = Depends(deps.get_current_admin_user),
+    db: Session = Depends(deps.get_db)
+):
+    """管理员删除权限"""
+    permission = crud.get_permission(db, permission_id)
+    if not permission:
+        raise HTTPException(status_code=404, detail="Permission not found")
+
+    deleted_permission = crud.delete_permission(db, permission_id)
+    return {"message": f"Permission {deleted_permission.name} deleted successfully"}
@@ -0,0 +1,83 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import List
+from .. import schemas, crud, deps
+
+router = APIRouter(prefix="/roles", tags=["roles"], route_class=deps.UnitOfWorkRoute)
+
+# 系统内置角色，不允许删除或改名
+BUILTIN_ROLES = ("user", "admin")
+
+@router.get("", response_model=List[schemas.Role], status_code=200)
+def get_roles(
+    skip: int = 0,
+    limit: int = 100,
+    current_user: schemas.UserOut = Depends(deps.get_current_admin_user),
+    db: Session = Depends(deps.get_db)
+):
+    """管理员获取角色列表"""
+    return crud.get_roles(db, skip=skip, limit=limit)
+
+@router.post("", response_model=schemas.Role, status_code=201)
+def create_role(
+    role_data: schemas.RoleCreate,
+    current_user: schemas.UserOut = Depends(deps.get_current_admin_user),
+    db: Session = Depends(deps.get_db)
+):
+    """管理员创建角色"""
+    # 名称冲突由唯一约束判定，不做先查后写
+    try:
+        role = crud.create_role(db, role_data)
+    except crud.RoleAlreadyExists:
+        raise HTTPException(status_code=409, detail="Role already exists")
+    return role
+
+@router.get("/{role_id}", response_model=schemas.Role, status_code=200)
+def get_role(
+    role_id: int,
+    current_user: schemas.UserOut = Depends(deps.get_current_admin_user),
+    db: Session = Depends(deps.get_db)
+):
+    """管理员获取指定角色"""
+    role = crud.get_role(db, role_id)
+    if not role:
+        raise HTTPException(status_code=404, detail="Role not found")
+    return role
+
+@router.put("/{role_id}", response_model=schemas.Role, status_code=200)
+def update_role(
+    role_id: int,
+    role_update: schemas.RoleUpdate,
+    current_user: schemas.UserOut = Depends(deps.get_current_admin_user),
+    db: Session = Depends(deps.get_db)
+):
+    """管理员更新角色信息及其权限"""
+    role = crud.get_role(db, role_id)
+    if not role:
+        raise HTTPException(status_code=404, detail="Role not found")
+
+    if role_update.name and role_update.name != role.name:
+        if role.name in BUILTIN_ROLES:
+            raise HTTPException(status_code=400, detail="Cannot rename built-in role")
+
+    try:
+        updated_role = crud.update_role(db, role_id, role_update)
+    except crud.RoleAlreadyExists:
+        raise HTTPException(status_code=409, detail="Role already exists")
+    return updated_role
+
+@router.delete("/{role_id}", status_code=200)
+def delete_role(
+    role_id: int,
+    current_user: schemas.UserOut = Depends(deps.get_current_admin_user),
+    db: Session = Depends(deps.get_db)
+):
+    """管理员删除角色"""
+    role = crud.get_role(db, role_id)
+    if not role:
+        raise HTTPException(status_code=404, detail="Role not found")
+    if role.name in BUILTIN_ROLES:
+        raise HTTPException(status_code=400, detail="Cannot delete built-in role")
+
+    deleted_role = crud.delete_role(db, role_id)
+    return {"message": f"Role {deleted_role.name} deleted successfully"}
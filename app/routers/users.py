@@ -1,26 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import List
-from .. import schemas, crud, auth, deps
+from typing import List, Optional
+from .. import schemas, crud, auth, deps, audit, sessions
+from ..compression import no_compression
+from ..idempotency import IdempotencyGuard
 import logging
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/users", tags=["users"])
+router = APIRouter(prefix="/users", tags=["users"], route_class=deps.UnitOfWorkRoute)
 
 @router.post("/register", response_model=schemas.UserOut, status_code=201)
-def register(register_req: schemas.UserCreate, db: Session = Depends(deps.get_db)):
-    if crud.get_user_by_username(db, register_req.username):
-        raise HTTPException(status_code=409, detail="Username already registered")
-    user = crud.create_user(db, register_req)
-    return user
+def register(
+    register_req: schemas.UserCreate,
+    db: Session = Depends(deps.get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
+    # 客户端超时重试时携带相同的 Idempotency-Key，直接返回首次请求的结果
+    with IdempotencyGuard(idempotency_key, "register", register_req) as guard:
+        if guard.replay is not None:
+            return guard.replay
+        # 用户名冲突由唯一索引判定，并发注册同名用户时只有一个成功，其余返回409
+        try:
+            user = crud.create_user(db, register_req)
+        except crud.UsernameAlreadyExists:
+            raise HTTPException(status_code=409, detail="Username already registered")
+        audit.record(db, user.id, "register")
+        guard.save(db, 201, schemas.UserOut.model_validate(user))
+        return user
 
 @router.post("/login", response_model=schemas.LoginResponse, status_code=200)
+@no_compression
 def login(user_in: schemas.UserLogin, db: Session = Depends(deps.get_db)):
     user = crud.authenticate_user(db, user_in.username, user_in.password)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    access_token = auth.create_access_token({"sub": user.username})
+    access_token = sessions.issue_token(db, user)
+    audit.record(db, user.id, "login")
     logger.info(f"User {user.username} logged in successfully")
     return schemas.LoginResponse(
         access_token=access_token,
@@ -29,6 +45,7 @@ def login(user_in: schemas.UserLogin, db: Session = Depends(deps.get_db)):
     )
 
 @router.get("/debug-token")
+@no_compression
 def debug_token(token: str = Depends(deps.oauth2_scheme)):
     """
     调试接口：检查token的状态，不进行用户验证
@@ -64,12 +81,16 @@ def verify_token(current_user: schemas.UserOut = Depends(deps.get_current_user))
     return current_user
 
 @router.post("/refresh-token", response_model=schemas.LoginResponse, status_code=200)
-def refresh_token(current_user: schemas.UserOut = Depends(deps.get_current_user)):
+@no_compression
+def refresh_token(
+    current_user: schemas.UserOut = Depends(deps.get_current_user),
+    db: Session = Depends(deps.get_db)
+):
     """
     刷新token，生成新的access_token
     前端可以在token即将过期时调用此接口
     """
-    access_token = auth.create_access_token({"sub": current_user.username})
+    access_token = sessions.issue_token(db, current_user)
     return schemas.LoginResponse(
         access_token=access_token,
         token_type="bearer",
@@ -87,16 +108,12 @@ def update_current_user_info(
     current_user: schemas.UserOut = Depends(deps.get_current_user),
     db: Session = Depends(deps.get_db)
 ):
-    update_data = user_update.dict(exclude_unset=True)
-    if "username" in update_data:
-        if crud.get_user_by_username(db, update_data["username"]):
-            raise HTTPException(status_code=409, detail="Username already registered")
-        user = crud.get_user(db, current_user.id)
-        user.username = update_data["username"]
-        db.commit()
-        db.refresh(user)
-        return user
-    return crud.update_user(db, current_user.id, user_update)
+    try:
+        user = crud.update_user(db, current_user.id, user_update)
+    except crud.UsernameAlreadyExists:
+        raise HTTPException(status_code=409, detail="Username already registered")
+    audit.record(db, user.id, "update_profile")
+    return user
 
 @router.put("/me/password", status_code=200)
 def change_current_user_password(
@@ -108,8 +125,7 @@ def change_current_user_password(
     if not auth.verify_password(data.old_password, user.hashed_password):
         raise HTTPException(status_code=400, detail="Old password is incorrect")
     user.hashed_password = auth.get_password_hash(data.new_password)
-    db.commit()
-    db.refresh(user)
+    audit.record(db, user.id, "change_password")
     return {"message": "Password updated successfully"}
 
 # 通配符路径放在最后
@@ -138,13 +154,12 @@ def update_user_info(
     user = crud.get_user(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    update_data = user_update.dict(exclude_unset=True)
-    if "username" in update_data:
-        if crud.get_user_by_username(db, update_data["username"]):
+    if "username" in user_update.dict(exclude_unset=True):
+        try:
+            user = crud.update_user(db, user_id, user_update)
+        except crud.UsernameAlreadyExists:
             raise HTTPException(status_code=409, detail="Username already registered")
-        user.username = update_data["username"]
-        db.commit()
-        db.refresh(user)
+        audit.record(db, user.id, "update_profile")
     return user
 
 @router.put("/{user_id}/password", status_code=200)
@@ -163,8 +178,7 @@ def change_password(
         if not auth.verify_password(data.old_password, user.hashed_password):
             raise HTTPException(status_code=400, detail="Old password is incorrect")
     user.hashed_password = auth.get_password_hash(data.new_password)
-    db.commit()
-    db.refresh(user)
+    audit.record(db, user.id, "change_password")
     return {"message": "Password updated successfully"}
 
 # 管理员接口 - 用户管理
@@ -183,14 +197,20 @@ def get_all_users(
 def create_user_by_admin(
     user_data: schemas.AdminUserCreate,
     current_user: schemas.UserOut = Depends(deps.get_current_admin_user),
-    db: Session = Depends(deps.get_db)
+    db: Session = Depends(deps.get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
-    """管理员创建新用户"""
-    if crud.get_user_by_username(db, user_data.username):
-        raise HTTPException(status_code=409, detail="Username already registered")
-    
-    user = crud.create_user_by_admin(db, user_data)
-    return user
+    """管理员创建新用户，支持 Idempotency-Key（按管理员区分）"""
+    with IdempotencyGuard(idempotency_key, f"admin_create:{current_user.id}", user_data) as guard:
+        if guard.replay is not None:
+            return guard.replay
+        try:
+            user = crud.create_user_by_admin(db, user_data)
+        except crud.UsernameAlreadyExists:
+            raise HTTPException(status_code=409, detail="Username already registered")
+        audit.record(db, user.id, "admin_create")
+        guard.save(db, 201, schemas.UserOut.model_validate(user))
+        return user
 
 @router.get("/admin/users/{user_id}", response_model=schemas.UserOut, status_code=200)
 def get_user_by_admin(
@@ -212,16 +232,16 @@ def update_user_by_admin(
     db: Session = Depends(deps.get_db)
 ):
     """管理员更新用户信息"""
-    user = crud.get_user(db, user_id)
-    if not user:
+    try:
+        updated_user = crud.update_user_by_admin(db, user_id, user_update)
+    except crud.UsernameAlreadyExists:
+        raise HTTPException(status_code=409, detail="Username already registered")
+    if not updated_user:
         raise HTTPException(status_code=404, detail="User not found")
-    
-    # 检查用户名是否已存在（如果要更新用户名）
-    if user_update.username and user_update.username != user.username:
-        if crud.get_user_by_username(db, user_update.username):
-            raise HTTPException(status_code=409, detail="Username already registered")
-    
-    updated_user = crud.update_user_by_admin(db, user_id, user_update)
+
+    if user_update.is_active is False:
+        sessions.revoke_sessions(db, [user_id])
+    audit.record(db, user_id, "admin_update")
     return updated_user
 
 @router.delete("/admin/users/{user_id}", status_code=200)
@@ -240,5 +260,115 @@ def delete_user_by_admin(
         raise HTTPException(status_code=400, detail="Cannot delete yourself")
     
     deleted_user = crud.delete_user(db, user_id)
+    sessions.revoke_sessions(db, [user_id])
+    audit.record(db, user_id, "admin_delete")
     return {"message": f"User {deleted_user.username} deleted successfully"}
 
+
+# 管理员接口 - 会话管理
+@router.get("/admin/users/{user_id}/sessions", response_model=List[schemas.SessionOut], status_code=200)
+def get_user_sessions(
+    user_id: str,
+    include_expired: bool = False,
+    current_user: schemas.UserOut = Depends(deps.get_current_admin_user),
+    db: Session = Depends(deps.get_db)
+):
+    """管理员查看用户的登录会话"""
+    return sessions.get_user_sessions(db, user_id, include_expired=include_expired)
+
+@router.delete("/admin/users/{user_id}/sessions", status_code=200)
+def revoke_user_sessions(
+    user_id: str,
+    current_user: schemas.UserOut = Depends(deps.get_current_admin_user),
+    db: Session = Depends(deps.get_db)
+):
+    """管理员吊销用户的所有会话"""
+    revoked = sessions.revoke_sessions(db, [user_id])
+    return {"message": f"{revoked} sessions revoked", "revoked": revoked}
+
+@router.delete("/admin/users/{user_id}/sessions/{jti}", status_code=200)
+def revoke_user_session(
+    user_id: str,
+    jti: str,
+    current_user: schemas.UserOut = Depends(deps.get_current_admin_user),
+    db: Session = Depends(deps.get_db)
+):
+    """管理员吊销用户的指定会话"""
+    if not sessions.revoke_sessions(db, [user_id], jti=jti):
+        raise HTTPException(status_code=404, detail="Session not found")
+    return {"message": "Session revoked"}
+
+# 管理员接口 - 批量用户操作
+def _resolve_batch_targets(db: Session, selector: schemas.BatchUserSelector, current_user, protect_self: bool):
+    """解析批量操作目标，返回(待处理的用户id, 逐个结果)"""
+    if not selector.user_ids and selector.username_prefix is None and selector.is_active is None:
+        raise HTTPException(status_code=400, detail="user_ids or a filter is required")
+
+    existing_ids = crud.select_user_ids(db, selector)
+    existing = set(existing_ids)
+    target_ids = []
+    results = []
+    # 按请求中的顺序返回逐个结果；按条件筛选时按查询结果顺序
+    for user_id in dict.fromkeys(selector.user_ids or existing_ids):
+        if user_id not in existing:
+            results.append(schemas.BatchItemResult(user_id=user_id, status="not_found"))
+        elif protect_self and user_id == current_user.id:
+            results.append(schemas.BatchItemResult(user_id=user_id, status="skipped", detail="Cannot apply to yourself"))
+        else:
+            target_ids.append(user_id)
+            results.append(schemas.BatchItemResult(user_id=user_id, status="ok"))
+    return target_ids, results
+
+def _batch_result(results: List[schemas.BatchItemResult]) -> schemas.BatchResult:
+    succeeded = sum(1 for item in results if item.status == "ok")
+    return schemas.BatchResult(results=results, succeeded=succeeded, failed=len(results) - succeeded)
+
+@router.post("/admin/users/batch/activate", response_model=schemas.BatchResult, status_code=200)
+def batch_activate_users(
+    selector: schemas.BatchUserSelector,
+    current_user: schemas.UserOut = Depends(deps.get_current_admin_user),
+    db: Session = Depends(deps.get_db)
+):
+    """管理员批量启用用户"""
+    target_ids, results = _resolve_batch_targets(db, selector, current_user, protect_self=False)
+    crud.set_users_active(db, target_ids, True)
+    audit.record_many(db, target_ids, "admin_batch_activate")
+    return _batch_result(results)
+
+@router.post("/admin/users/batch/deactivate", response_model=schemas.BatchResult, status_code=200)
+def batch_deactivate_users(
+    selector: schemas.BatchUserSelector,
+    current_user: schemas.UserOut = Depends(deps.get_current_admin_user),
+    db: Session = Depends(deps.get_db)
+):
+    """管理员批量禁用用户（不会禁用自己）"""
+    target_ids, results = _resolve_batch_targets(db, selector, current_user, protect_self=True)
+    crud.set_users_active(db, target_ids, False)
+    sessions.revoke_sessions(db, target_ids)
+    audit.record_many(db, target_ids, "admin_batch_deactivate")
+    return _batch_result(results)
+
+@router.post("/admin/users/batch/roles", response_model=schemas.BatchResult, status_code=200)
+def batch_assign_roles(
+    data: schemas.BatchRoleAssign,
+    current_user: schemas.UserOut = Depends(deps.get_current_admin_user),
+    db: Session = Depends(deps.get_db)
+):
+    """管理员批量为用户追加角色"""
+    target_ids, results = _resolve_batch_targets(db, data, current_user, protect_self=False)
+    crud.assign_roles_to_users(db, target_ids, data.roles)
+    audit.record_many(db, target_ids, "admin_batch_roles")
+    return _batch_result(results)
+
+@router.post("/admin/users/batch/delete", response_model=schemas.BatchResult, status_code=200)
+def batch_delete_users(
+    selector: schemas.BatchUserSelector,
+    current_user: schemas.UserOut = Depends(deps.get_current_admin_user),
+    db: Session = Depends(deps.get_db)
+):
+    """管理员批量删除用户（不会删除自己）"""
+    target_ids, results = _resolve_batch_targets(db, selector, current_user, protect_self=True)
+    crud.delete_users(db, target_ids)
+    sessions.revoke_sessions(db, target_ids)
+    audit.record_many(db, target_ids, "admin_batch_delete")
+    return _batch_result(results)
@@ -10,6 +10,10 @@ class PermissionBase(BaseModel):
 class PermissionCreate(PermissionBase):
     pass
 
+class PermissionUpdate(BaseModel):
+    name: Optional[str] = None
+    description: Optional[str] = None
+
 class Permission(PermissionBase):
     id: int
     created_time: datetime
@@ -24,6 +28,11 @@ class RoleBase(BaseModel):
 class RoleCreate(RoleBase):
     permissions: List[int] = []
 
+class RoleUpdate(BaseModel):
+    name: Optional[str] = None
+    description: Optional[str] = None
+    permissions: Optional[List[int]] = None  # 权限ID列表，传入时整体替换
+
 class Role(RoleBase):
     id: int
     created_time: datetime
@@ -85,4 +94,45 @@ class AdminUserUpdate(BaseModel):
     username: Optional[str] = None
     password: Optional[str] = None
     is_active: Optional[bool] = None
-    roles: Optional[List[int]] = None
\ No newline at end of file
+    roles: Optional[List[int]] = None
+
+class SessionOut(BaseModel):
+    jti: str
+    user_id: str
+    created_time: datetime
+    expires_at: datetime
+    last_seen: Optional[datetime] = None
+    revoked: bool
+
+    class Config:
+        from_attributes = True
+
+class LogOut(BaseModel):
+    id: int
+    user_id: Optional[str] = None
+    action: str
+    timestamp: datetime
+
+class LogPage(BaseModel):
+    items: List[LogOut]
+    next_cursor: Optional[str] = None  # 传入下一次请求的 cursor 参数获取下一页，为空表示没有更多
+
+class BatchUserSelector(BaseModel):
+    """批量操作的目标用户：按id列表指定，或按条件筛选"""
+    user_ids: List[str] = []
+    username_prefix: Optional[str] = None
+    is_active: Optional[bool] = None
+
+class BatchRoleAssign(BatchUserSelector):
+    """批量为用户追加角色"""
+    roles: List[int]  # 角色ID列表
+
+class BatchItemResult(BaseModel):
+    user_id: str
+    status: str  # ok / not_found / skipped
+    detail: Optional[str] = None
+
+class BatchResult(BaseModel):
+    results: List[BatchItemResult]
+    succeeded: int
+    failed: int
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+多进程启动入口（跨平台，Windows可用）
+主进程先完成建表和初始数据写入并启动共享状态服务，再启动多个uvicorn worker
+
+用法: python -m app.serve --workers 4
+"""
+
+import argparse
+import os
+
+import uvicorn
+
+from . import init_db, state
+from .database import engine
+
+def main():
+    parser = argparse.ArgumentParser(description="多进程启动API服务")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=16666)
+    # 默认与CPU核数相同，与 gunicorn.conf.py 一致
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)))
+    # 服务端参数，取值说明见 SETUP.md 的“服务端参数”一节
+    parser.add_argument("--http", choices=["auto", "h11", "httptools"], default=os.getenv("UVICORN_HTTP", "auto"))
+    parser.add_argument("--timeout-keep-alive", type=int, default=int(os.getenv("UVICORN_KEEP_ALIVE", "15")))
+    parser.add_argument("--backlog", type=int, default=int(os.getenv("UVICORN_BACKLOG", "2048")))
+    parser.add_argument("--limit-concurrency", type=int, default=None)
+    parser.add_argument("--timeout-graceful-shutdown", type=int, default=int(os.getenv("UVICORN_GRACEFUL_SHUTDOWN", "30")))
+    args = parser.parse_args()
+
+    # 共享状态服务先于初始化启动，worker继承环境变量中的地址
+    manager = state.start_server()
+    init_db.init_all()
+    # 不把主进程的数据库连接带入worker
+    engine.dispose()
+    os.environ["APP_SKIP_INIT"] = "1"
+
+    try:
+        uvicorn.run(
+            "app.main:app",
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            http=args.http,
+            timeout_keep_alive=args.timeout_keep_alive,
+            backlog=args.backlog,
+            limit_concurrency=args.limit_concurrency,
+            timeout_graceful_shutdown=args.timeout_graceful_shutdown,
+        )
+    finally:
+        manager.shutdown()
+
+if __name__ == "__main__":
+    main()
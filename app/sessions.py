@@ -0,0 +1,182 @@
+from sqlalchemy import bindparam, event, update
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import logging
+import threading
+import uuid
+import os
+from . import auth, models, schemas, state
+from .database import RoutingSession, SessionLocal, engine
+
+logger = logging.getLogger(__name__)
+
+# 会话最后活跃时间在内存中累积，每隔这么多秒合并写入数据库一次
+SESSION_FLUSH_SECONDS = int(os.getenv("SESSION_FLUSH_SECONDS", "60"))
+
+def _revoked_key(jti: str) -> str:
+    return f"revoked:{jti}"
+
+class SessionRegistry:
+    """记录会话最后活跃时间
+
+    每次请求只更新内存中的时间戳，后台线程定期把累积的更新合并写入数据库，
+    每个会话每个周期最多写一行
+    """
+
+    def __init__(self, flush_interval: int):
+        self.flush_interval = flush_interval
+        self._pending: Dict[str, datetime] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def touch(self, jti: str) -> None:
+        with self._lock:
+            self._pending[jti] = datetime.utcnow()
+            if self._thread is None:
+                self._start()
+
+    def pending_last_seen(self, jti: str) -> Optional[datetime]:
+        with self._lock:
+            return self._pending.get(jti)
+
+    def flush(self) -> int:
+        """把累积的最后活跃时间写入数据库，返回写入的会话数"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        table = models.UserSession.__table__
+        statement = (
+            update(table)
+            .where(table.c.jti == bindparam("b_jti"))
+            .values(last_seen=bindparam("b_last_seen"))
+        )
+        try:
+            with engine.begin() as conn:
+                conn.execute(statement, [{"b_jti": jti, "b_last_seen": seen} for jti, seen in pending.items()])
+        except Exception:
+            # 写入失败时放回内存，等下次合并；期间又有新的时间戳时保留较新的
+            with self._lock:
+                for jti, seen in pending.items():
+                    current = self._pending.get(jti)
+                    if current is None or current < seen:
+                        self._pending[jti] = seen
+            raise
+        return len(pending)
+
+    def _start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="session-registry-flush", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to flush session last_seen updates")
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """停止后台线程（最多等待 timeout 秒）并写入剩余的更新"""
+        self._stop.set()
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout)
+            if thread.is_alive():
+                logger.warning(f"Session flush thread did not stop within {timeout}s")
+        self.flush()
+
+registry = SessionRegistry(SESSION_FLUSH_SECONDS)
+
+def issue_token(db: Session, user: models.User) -> str:
+    """为用户签发access token并登记会话"""
+    jti = uuid.uuid4().hex
+    expires_delta = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
+    token = auth.create_access_token({"sub": user.username, "jti": jti}, expires_delta)
+    db.add(models.UserSession(
+        jti=jti,
+        user_id=user.id,
+        expires_at=datetime.utcnow() + expires_delta,
+    ))
+    # 登录请求没有经过 get_current_user，在这里记录写入主体，保证登录后立即读到自己的数据
+    db.info.setdefault("principal", user.username)
+    return token
+
+def is_revoked(jti: str) -> bool:
+    return bool(state.get_store().get(_revoked_key(jti)))
+
+def get_user_sessions(db: Session, user_id: str, include_expired: bool = False) -> List[schemas.SessionOut]:
+    query = db.query(models.UserSession).filter(models.UserSession.user_id == user_id)
+    if not include_expired:
+        query = query.filter(models.UserSession.expires_at > datetime.utcnow())
+    result = []
+    for session in query.order_by(models.UserSession.created_time.desc()).all():
+        item = schemas.SessionOut.model_validate(session)
+        # 合并内存中尚未写入数据库的最后活跃时间
+        seen = registry.pending_last_seen(session.jti)
+        if seen is not None:
+            item.last_seen = seen
+        result.append(item)
+    return result
+
+def revoke_sessions(db: Session, user_ids: List[str], jti: Optional[str] = None) -> int:
+    """吊销用户的未过期会话，提交后写入共享状态存储使其在所有worker立即失效"""
+    if not user_ids:
+        return 0
+    query = db.query(models.UserSession.jti, models.UserSession.expires_at).filter(
+        models.UserSession.user_id.in_(user_ids),
+        models.UserSession.revoked.is_(False),
+        models.UserSession.expires_at > datetime.utcnow(),
+    )
+    if jti is not None:
+        query = query.filter(models.UserSession.jti == jti)
+    rows = query.all()
+    if not rows:
+        return 0
+
+    db.execute(
+        update(models.UserSession)
+        .where(models.UserSession.jti.in_([row.jti for row in rows]))
+        .values(revoked=True)
+        .execution_options(synchronize_session=False)
+    )
+    db.info.setdefault("revoked_sessions", []).extend(rows)
+    return len(rows)
+
+def _mark_revoked(rows) -> None:
+    store = state.get_store()
+    now = datetime.utcnow()
+    for jti, expires_at in rows:
+        ttl = (expires_at - now).total_seconds()
+        if ttl > 0:
+            store.set(_revoked_key(jti), True, ttl=ttl)
+
+@event.listens_for(RoutingSession, "after_commit")
+def _publish_revocations(session):
+    rows = session.info.pop("revoked_sessions", None)
+    if rows:
+        _mark_revoked(rows)
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _discard_revocations(session):
+    session.info.pop("revoked_sessions", None)
+
+def load_revocations() -> int:
+    """启动时把数据库中未过期的已吊销会话加载到共享状态存储"""
+    with SessionLocal() as db:
+        rows = db.query(models.UserSession.jti, models.UserSession.expires_at).filter(
+            models.UserSession.revoked.is_(True),
+            models.UserSession.expires_at > datetime.utcnow(),
+        ).all()
+    _mark_revoked(rows)
+    return len(rows)
+
+def purge_expired() -> int:
+    """删除已过期的会话记录"""
+    table = models.UserSession.__table__
+    with engine.begin() as conn:
+        result = conn.execute(table.delete().where(table.c.expires_at <= datetime.utcnow()))
+    return result.rowcount
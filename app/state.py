@@ -0,0 +1,142 @@
+from collections import OrderedDict
+from multiprocessing.managers import BaseManager
+from typing import Any, Optional
+import secrets
+import threading
+import time
+import os
+
+def _expire_at(ttl: Optional[float]) -> Optional[float]:
+    # ttl 为 None 表示不过期；0 或负数表示立即过期，不能当作不过期处理
+    return None if ttl is None else time.monotonic() + ttl
+
+class LocalStore:
+    """进程内键值存储，支持过期时间和原子自增
+
+    指定 max_entries 时为有界存储，超出后淘汰最久未读写的键（LRU）。
+    过期的键在读取时删除，写入时每隔 sweep_interval 秒再整体清理一次，
+    避免只写不读的键（如吊销记录）一直占用内存
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, sweep_interval: float = 60.0):
+        self._data = OrderedDict()
+        self._max_entries = max_entries
+        self._sweep_interval = sweep_interval
+        self._next_sweep = time.monotonic() + sweep_interval
+        self._lock = threading.Lock()
+
+    def _sweep(self, now: float) -> None:
+        expired = [key for key, (_, expire_at) in self._data.items() if expire_at is not None and expire_at <= now]
+        for key in expired:
+            del self._data[key]
+        self._next_sweep = now + self._sweep_interval
+
+    def _put(self, key: str, value: Any, expire_at: Optional[float]) -> None:
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self._sweep(now)
+        self._data[key] = (value, expire_at)
+        self._data.move_to_end(key)
+        if self._max_entries is not None:
+            while len(self._data) > self._max_entries:
+                self._data.popitem(last=False)
+
+    def _get_entry(self, key: str):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expire_at = entry
+        if expire_at is not None and expire_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return entry
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._get_entry(key)
+            if entry is None:
+                return default
+            self._data.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._put(key, value, _expire_at(ttl))
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """仅当键不存在时写入，返回是否写入成功"""
+        with self._lock:
+            if self._get_entry(key) is not None:
+                return False
+            self._put(key, value, _expire_at(ttl))
+            return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        """原子自增，键不存在时从0开始并按ttl设置过期时间"""
+        with self._lock:
+            entry = self._get_entry(key)
+            if entry is None:
+                value, expire_at = amount, _expire_at(ttl)
+            else:
+                value, expire_at = entry[0] + amount, entry[1]
+            self._put(key, value, expire_at)
+            return value
+
+# 共享状态服务进程中的存储实例，按命名空间区分，各命名空间的容量上限互不影响
+_server_stores = {}
+_server_stores_lock = threading.Lock()
+
+def _get_server_store(namespace: str = "default", max_entries: Optional[int] = None) -> LocalStore:
+    with _server_stores_lock:
+        if namespace not in _server_stores:
+            _server_stores[namespace] = LocalStore(max_entries)
+        return _server_stores[namespace]
+
+class StateManager(BaseManager):
+    pass
+
+StateManager.register("get_store", callable=_get_server_store)
+
+def start_server(host: str = "127.0.0.1", port: int = 0) -> StateManager:
+    """在主进程中启动共享状态服务，并通过环境变量把地址传给worker进程"""
+    authkey = os.getenv("STATE_STORE_AUTHKEY") or secrets.token_hex(16)
+    manager = StateManager(address=(host, port), authkey=authkey.encode())
+    manager.start()
+    address_host, address_port = manager.address
+    os.environ["STATE_STORE_ADDRESS"] = f"{address_host}:{address_port}"
+    os.environ["STATE_STORE_AUTHKEY"] = authkey
+    return manager
+
+_stores = {}
+_manager = None
+_store_lock = threading.Lock()
+
+def get_store(namespace: str = "default", max_entries: Optional[int] = None):
+    """获取状态存储：配置了共享服务地址时连接共享服务，否则使用进程内存储
+
+    地址在首次调用时从环境变量读取（形如 "127.0.0.1:50000"），
+    这样主进程在fork之前设置的地址对worker进程同样生效。
+    需要限制容量的数据（如缓存的响应）应使用独立的命名空间，避免挤掉吊销记录等数据
+    """
+    global _manager
+    store = _stores.get(namespace)
+    if store is None:
+        with _store_lock:
+            store = _stores.get(namespace)
+            if store is None:
+                address = os.getenv("STATE_STORE_ADDRESS")
+                if address:
+                    if _manager is None:
+                        host, port = address.rsplit(":", 1)
+                        authkey = os.getenv("STATE_STORE_AUTHKEY", "").encode()
+                        _manager = StateManager(address=(host, int(port)), authkey=authkey)
+                        _manager.connect()
+                    store = _manager.get_store(namespace, max_entries)
+                else:
+                    store = LocalStore(max_entries)
+                _stores[namespace] = store
+    return store
@@ -12,9 +12,10 @@ from datetime import datetime
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+# 导入app不会建表、写入初始数据或访问数据库，只构建路由
 try:
-    from fastapi.openapi.utils import get_openapi
     from app.main import app
+    from app.openapi import build_openapi_schema
 except ImportError as e:
     print(f"❌ 导入错误: {e}")
     print("请确保已安装所有依赖: pip install -r requirements.txt")
@@ -24,47 +25,13 @@ def generate_openapi_json():
     """使用FastAPI的OpenAPI工具生成API文档"""
     
     try:
-        # 获取OpenAPI规范
-        openapi_schema = get_openapi(
-            title="Attack Monitor Backend API",
-            version="1.0.0",
-            description="攻击监控系统后端API接口",
-            routes=app.routes,
-        )
+        # 获取OpenAPI规范（包含标签、安全方案等自定义信息，与服务端 /openapi.json 一致）
+        openapi_schema = build_openapi_schema(app)
         
         # 添加自定义信息
         openapi_schema["info"]["x-generated-at"] = datetime.now().isoformat()
         openapi_schema["info"]["x-description"] = "此文件由FastAPI自动生成，用于AI生成前端代码"
         
-        # 添加自定义标签说明
-        openapi_schema["tags"] = [
-            {
-                "name": "users",
-                "description": "用户管理相关接口，包括注册、登录、信息管理等"
-            }
-        ]
-        
-        # 添加安全方案说明
-        if "components" not in openapi_schema:
-            openapi_schema["components"] = {}
-        
-        if "securitySchemes" not in openapi_schema["components"]:
-            openapi_schema["components"]["securitySchemes"] = {}
-        
-        openapi_schema["components"]["securitySchemes"]["bearerAuth"] = {
-            "type": "http",
-            "scheme": "bearer",
-            "bearerFormat": "JWT",
-            "description": "JWT Bearer Token认证"
-        }
-        
-        # 为需要认证的接口添加安全要求
-        for path, path_item in openapi_schema["paths"].items():
-            for method, operation in path_item.items():
-                if method.lower() in ["get", "put", "delete"] and path != "/users/register" and path != "/users/login":
-                    if "security" not in operation:
-                        operation["security"] = [{"bearerAuth": []}]
-        
         # 写入文件
         with open('openapi.json', 'w', encoding='utf-8') as f:
             json.dump(openapi_schema, f, ensure_ascii=False, indent=2)
@@ -84,12 +51,7 @@ def generate_ai_friendly_json():
     
     try:
         # 首先获取OpenAPI规范
-        openapi_schema = get_openapi(
-            title="Attack Monitor Backend API",
-            version="1.0.0",
-            description="攻击监控系统后端API接口",
-            routes=app.routes,
-        )
+        openapi_schema = build_openapi_schema(app)
         
         # 转换为AI友好的格式
         ai_friendly_data = {
@@ -0,0 +1,33 @@
+"""
+gunicorn配置（Linux部署）
+用法: gunicorn -c gunicorn.conf.py app.main:app
+"""
+
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:16666")
+# 默认与CPU核数相同：bcrypt是CPU密集的，SQLite写入是串行的，更多worker只会增加锁等待
+workers = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+worker_class = "uvicorn.workers.UvicornWorker"
+# 与 app/serve.py 的默认值保持一致，见 SETUP.md 的“服务端参数”一节
+keepalive = int(os.getenv("UVICORN_KEEP_ALIVE", "15"))
+backlog = int(os.getenv("UVICORN_BACKLOG", "2048"))
+# 收到停止信号后等待worker处理完进行中请求的时间（秒），与 app/serve.py 的 --timeout-graceful-shutdown 一致
+graceful_timeout = int(os.getenv("UVICORN_GRACEFUL_SHUTDOWN", "30"))
+
+_state_manager = None
+
+def on_starting(server):
+    """主进程fork worker之前执行：启动共享状态服务并完成一次性初始化"""
+    global _state_manager
+    from app import init_db, state
+    from app.database import engine
+
+    _state_manager = state.start_server()
+    init_db.init_all()
+    engine.dispose()
+    os.environ["APP_SKIP_INIT"] = "1"
+
+def on_exit(server):
+    if _state_manager is not None:
+        _state_manager.shutdown()
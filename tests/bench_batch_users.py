@@ -0,0 +1,67 @@
+"""批量禁用用户与逐个禁用的耗时对比（不是pytest用例）
+
+用法: python tests/bench_batch_users.py [用户数，默认500]
+
+使用临时数据库，两组各N个用户：一组逐个调用 PUT /users/admin/users/{id}，
+另一组调用一次 POST /users/admin/users/batch/deactivate
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+
+_tmpdir = tempfile.mkdtemp(prefix="backend-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmpdir, 'bench.db')}"
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.pop("REPLICA_DATABASE_URL", None)
+os.environ.pop("STATE_STORE_ADDRESS", None)
+os.environ.pop("APP_SKIP_INIT", None)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+from app import auth, database, models
+from app.main import app
+
+
+def _create_users(count: int):
+    hashed_password = auth.get_password_hash("secret")
+    rows = [
+        {"id": str(uuid.uuid4()), "username": f"bench_{uuid.uuid4().hex[:12]}", "hashed_password": hashed_password}
+        for _ in range(count)
+    ]
+    with database.engine.begin() as conn:
+        conn.execute(models.User.__table__.insert(), rows)
+    return [row["id"] for row in rows]
+
+
+def main(count: int) -> None:
+    with TestClient(app) as client:
+        token = client.post("/users/login", json={"username": "admin", "password": "admin123"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        loop_ids, batch_ids = _create_users(count), _create_users(count)
+
+        started = time.perf_counter()
+        for user_id in loop_ids:
+            response = client.put(f"/users/admin/users/{user_id}", json={"is_active": False}, headers=headers)
+            assert response.status_code == 200
+        loop_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        response = client.post("/users/admin/users/batch/deactivate", json={"user_ids": batch_ids}, headers=headers)
+        assert response.status_code == 200 and response.json()["succeeded"] == count
+        batch_seconds = time.perf_counter() - started
+
+    print(f"{count} users: per-user loop {loop_seconds:.2f}s, batch {batch_seconds:.2f}s "
+          f"({loop_seconds / batch_seconds:.0f}x)")
+
+
+if __name__ == "__main__":
+    try:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
+    finally:
+        database.engine.dispose()
+        shutil.rmtree(_tmpdir, ignore_errors=True)
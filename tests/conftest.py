@@ -0,0 +1,104 @@
+import atexit
+import shutil
+import tempfile
+import os
+
+# 测试使用临时数据库和进程内状态存储，必须在导入 app 之前设置
+_tmpdir = tempfile.mkdtemp(prefix="backend-tests-")
+atexit.register(shutil.rmtree, _tmpdir, ignore_errors=True)
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmpdir, 'test.db')}"
+os.environ.pop("REPLICA_DATABASE_URL", None)
+os.environ.pop("STATE_STORE_ADDRESS", None)
+os.environ.pop("APP_SKIP_INIT", None)
+# 调低bcrypt轮数，加快注册和登录
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture(scope="session")
+def login(client):
+    """登录并返回带token的请求头"""
+
+    def _login(username: str, password: str) -> dict:
+        response = client.post("/users/login", json={"username": username, "password": password})
+        assert response.status_code == 200, response.text
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    return _login
+
+
+@pytest.fixture(scope="session")
+def admin_headers(login):
+    return login("admin", "admin123")
+
+
+@pytest.fixture
+def unique_name():
+    return f"t_{uuid.uuid4().hex[:12]}"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def run_server(tmp_path):
+    """以 python -m app.serve 启动真实的服务进程，使用独立的数据库文件，返回 (地址, 数据库路径)
+
+    调用返回的 stop() 或测试结束时发送SIGTERM并等待进程退出
+    """
+    processes = []
+    db_path = tmp_path / "server.db"
+
+    def start(workers: int = 1, **extra_env):
+        port = _free_port()
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}", **extra_env)
+        env.pop("STATE_STORE_ADDRESS", None)
+        process = subprocess.Popen(
+            [sys.executable, "-m", "app.serve", "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers)],
+            cwd=Path(__file__).resolve().parent.parent,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        processes.append(process)
+        base_url = f"http://127.0.0.1:{port}"
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                if httpx.get(f"{base_url}/openapi.json").status_code == 200:
+                    return base_url, db_path
+            except httpx.TransportError:
+                pass
+            assert process.poll() is None and time.monotonic() < deadline, "server did not start"
+            time.sleep(0.2)
+
+    def stop():
+        while processes:
+            process = processes.pop()
+            process.terminate()
+            assert process.wait(timeout=60) == 0
+
+    start.stop = stop
+    yield start
+    stop()
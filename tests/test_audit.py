@@ -0,0 +1,64 @@
+import threading
+from datetime import datetime
+
+from sqlalchemy import inspect
+
+from app import audit, database
+
+
+def _partition_exists(name: str) -> bool:
+    return name in inspect(database.engine).get_table_names()
+
+
+def test_record_creates_missing_partition_idempotently(client, monkeypatch):
+    # 模拟两个进程同时首次写入新月份：检查时都认为分表不存在
+    monkeypatch.setattr(audit, "list_partitions", lambda bind: [])
+    timestamp = datetime(2030, 1, 15)
+    for _ in range(2):
+        with database.SessionLocal() as db:
+            audit.record(db, None, "test", timestamp=timestamp)
+            db.commit()
+    assert _partition_exists("logs_203001")
+
+
+def test_concurrent_maintenance_is_idempotent(client, monkeypatch):
+    monkeypatch.setattr(audit, "LOG_RETENTION_MONTHS", 1000)
+    errors = []
+
+    def run():
+        try:
+            audit.maintain_partitions(now=datetime(2031, 5, 1))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert _partition_exists("logs_203105") and _partition_exists("logs_203106")
+
+
+def test_maintainer_runs_periodically(client, monkeypatch):
+    calls = threading.Event()
+    monkeypatch.setattr(audit, "maintain_partitions", lambda: calls.set() or [])
+    maintainer = audit.PartitionMaintainer(interval=0.01)
+    maintainer.start()
+    try:
+        assert calls.wait(2)
+    finally:
+        maintainer.stop()
+
+
+def test_batch_operations_write_audit_rows(client, admin_headers, unique_name):
+    user_ids = []
+    for suffix in ("a", "b"):
+        response = client.post("/users/register", json={"username": unique_name + suffix, "password": "secret"})
+        user_ids.append(response.json()["id"])
+
+    response = client.post("/users/admin/users/batch/deactivate", json={"user_ids": user_ids}, headers=admin_headers)
+    assert response.status_code == 200
+
+    logs = client.get("/logs", params={"action": "admin_batch_deactivate", "limit": 500}, headers=admin_headers)
+    assert set(user_ids) <= {item["user_id"] for item in logs.json()["items"]}
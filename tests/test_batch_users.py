@@ -0,0 +1,125 @@
+import pytest
+from sqlalchemy import func, select
+
+from app import database, models
+
+
+@pytest.fixture
+def make_users(client, login):
+    """注册用户并登录，返回 [{"id", "username", "headers"}]"""
+
+    def _make(*usernames):
+        users = []
+        for username in usernames:
+            response = client.post("/users/register", json={"username": username, "password": "secret"})
+            assert response.status_code == 201
+            users.append({
+                "id": response.json()["id"],
+                "username": username,
+                "headers": login(username, "secret"),
+            })
+        return users
+
+    return _make
+
+
+@pytest.fixture(scope="module")
+def admin_id(client, admin_headers):
+    return client.get("/users/me", headers=admin_headers).json()["id"]
+
+
+def _is_active(client, admin_headers, user_id):
+    return client.get(f"/users/admin/users/{user_id}", headers=admin_headers).json()["is_active"]
+
+
+def _role_rows(user_ids):
+    with database.engine.connect() as conn:
+        return conn.execute(
+            select(models.user_role.c.user_id, models.user_role.c.role_id, func.count())
+            .where(models.user_role.c.user_id.in_(user_ids))
+            .group_by(models.user_role.c.user_id, models.user_role.c.role_id)
+        ).all()
+
+
+def test_per_id_outcomes(client, admin_headers, admin_id, make_users, unique_name):
+    (user,) = make_users(unique_name)
+    response = client.post(
+        "/users/admin/users/batch/deactivate",
+        json={"user_ids": [user["id"], "missing-id", admin_id, user["id"]]},
+        headers=admin_headers,
+    )
+    assert response.status_code == 200
+    body = response.json()
+    # 按请求顺序返回，重复的id只处理一次
+    assert [(item["user_id"], item["status"]) for item in body["results"]] == [
+        (user["id"], "ok"), ("missing-id", "not_found"), (admin_id, "skipped"),
+    ]
+    assert (body["succeeded"], body["failed"]) == (1, 2)
+    assert _is_active(client, admin_headers, user["id"]) is False
+    assert _is_active(client, admin_headers, admin_id) is True
+
+
+def test_select_by_prefix_and_is_active(client, admin_headers, make_users, unique_name):
+    first, second = make_users(unique_name + "a", unique_name + "b")
+    # "_" 在LIKE中是通配符，前缀需要转义，这个用户不应被选中
+    (decoy,) = make_users(unique_name.replace("_", "X", 1) + "c")
+
+    response = client.post(
+        "/users/admin/users/batch/deactivate", json={"username_prefix": unique_name}, headers=admin_headers
+    )
+    assert {item["user_id"] for item in response.json()["results"]} == {first["id"], second["id"]}
+    assert _is_active(client, admin_headers, decoy["id"]) is True
+
+    client.post("/users/admin/users/batch/activate", json={"user_ids": [first["id"]]}, headers=admin_headers)
+    response = client.post(
+        "/users/admin/users/batch/activate",
+        json={"username_prefix": unique_name, "is_active": False},
+        headers=admin_headers,
+    )
+    assert [item["user_id"] for item in response.json()["results"]] == [second["id"]]
+    assert _is_active(client, admin_headers, second["id"]) is True
+
+
+def test_empty_selector_is_rejected(client, admin_headers):
+    response = client.post("/users/admin/users/batch/deactivate", json={}, headers=admin_headers)
+    assert response.status_code == 400
+
+
+def test_batch_roles_skips_existing_rows_and_unknown_roles(client, admin_headers, make_users, unique_name):
+    first, second = make_users(unique_name + "a", unique_name + "b")
+    role_id = client.post("/roles", json={"name": unique_name}, headers=admin_headers).json()["id"]
+
+    payload = {"user_ids": [first["id"]], "roles": [role_id]}
+    assert client.post("/users/admin/users/batch/roles", json=payload, headers=admin_headers).status_code == 200
+    payload = {"user_ids": [first["id"], second["id"]], "roles": [role_id, 999999]}
+    response = client.post("/users/admin/users/batch/roles", json=payload, headers=admin_headers)
+    assert response.json()["succeeded"] == 2
+
+    rows = _role_rows([first["id"], second["id"]])
+    # 已有的关联没有重复插入，不存在的角色id被忽略
+    assert all(count == 1 for _, _, count in rows)
+    assert {(user_id, rid) for user_id, rid, _ in rows if rid == role_id} == {
+        (first["id"], role_id), (second["id"], role_id),
+    }
+    assert 999999 not in {rid for _, rid, _ in rows}
+
+
+def test_batch_delete_removes_roles_and_revokes_sessions(client, admin_headers, admin_id, make_users, unique_name):
+    first, second = make_users(unique_name + "a", unique_name + "b")
+    assert _role_rows([first["id"], second["id"]])
+
+    response = client.post(
+        "/users/admin/users/batch/delete",
+        json={"user_ids": [first["id"], second["id"], admin_id]},
+        headers=admin_headers,
+    )
+    assert [item["status"] for item in response.json()["results"]] == ["ok", "ok", "skipped"]
+    assert _role_rows([first["id"], second["id"]]) == []
+    assert client.get(f"/users/admin/users/{first['id']}", headers=admin_headers).status_code == 404
+    for user in (first, second):
+        assert client.get("/users/me", headers=user["headers"]).status_code == 401
+    with database.engine.connect() as conn:
+        revoked = conn.execute(
+            select(models.UserSession.revoked).where(models.UserSession.user_id.in_([first["id"], second["id"]]))
+        ).scalars().all()
+    assert revoked and all(revoked)
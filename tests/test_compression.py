@@ -0,0 +1,67 @@
+import gzip
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.compression import CompressionMiddleware
+
+GZIP = {"Accept-Encoding": "gzip"}
+
+
+def _register(client, username):
+    response = client.post("/users/register", json={"username": username, "password": "secret"})
+    assert response.status_code == 201
+
+
+def test_large_admin_listing_is_gzipped(client, admin_headers, unique_name):
+    for i in range(10):
+        _register(client, f"{unique_name}_{i}")
+    response = client.get("/users/admin/users", params={"limit": 1000}, headers={**admin_headers, **GZIP})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    # httpx 自动解压，内容应完整
+    assert f"{unique_name}_9" in {user["username"] for user in response.json()["users"]}
+
+
+def test_small_body_is_not_compressed(client, admin_headers):
+    response = client.get("/users/me", headers={**admin_headers, **GZIP})
+    assert response.status_code == 200
+    assert len(response.content) < 1024
+    assert "content-encoding" not in response.headers
+
+
+def test_login_is_never_compressed(client, unique_name):
+    # 用户名很长，响应体超过阈值，但登录响应包含token，不能压缩
+    username = unique_name + "x" * 2000
+    _register(client, username)
+    response = client.post("/users/login", json={"username": username, "password": "secret"}, headers=GZIP)
+    assert response.status_code == 200
+    assert len(response.content) > 1024
+    assert "content-encoding" not in response.headers
+
+
+def test_gzip_q_zero_is_honoured(client, admin_headers):
+    response = client.get(
+        "/users/admin/users", params={"limit": 1000}, headers={**admin_headers, "Accept-Encoding": "gzip;q=0"}
+    )
+    assert response.status_code == 200
+    assert len(response.content) > 1024
+    assert "content-encoding" not in response.headers
+
+
+def test_streaming_response_round_trip():
+    chunks = [f'{{"line": {i}, "padding": "{"x" * 100}"}}\n'.encode() for i in range(50)]
+    app = FastAPI()
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter(chunks), media_type="application/json")
+
+    with TestClient(CompressionMiddleware(app, encodings=["gzip"])) as client:
+        with client.stream("GET", "/stream", headers=GZIP) as response:
+            assert response.headers["content-encoding"] == "gzip"
+            assert "content-length" not in response.headers
+            raw = b"".join(response.iter_raw())
+    assert gzip.decompress(raw) == b"".join(chunks)
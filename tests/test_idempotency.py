@@ -0,0 +1,88 @@
+import uuid
+
+import pytest
+from fastapi import HTTPException
+
+from app import crud, idempotency, schemas
+
+
+@pytest.fixture
+def key():
+    return uuid.uuid4().hex
+
+
+@pytest.fixture
+def create_calls(monkeypatch):
+    """统计 crud.create_user 的调用次数"""
+    calls = []
+    original = crud.create_user
+
+    def create_user(db, user):
+        calls.append(user.username)
+        return original(db, user)
+
+    monkeypatch.setattr(crud, "create_user", create_user)
+    return calls
+
+
+def _register(client, key, username, password="secret"):
+    return client.post(
+        "/users/register",
+        json={"username": username, "password": password},
+        headers={"Idempotency-Key": key},
+    )
+
+
+def test_replay_returns_saved_response_without_creating_again(client, key, unique_name, create_calls):
+    first = _register(client, key, unique_name)
+    assert first.status_code == 201
+    assert "idempotent-replayed" not in first.headers
+
+    second = _register(client, key, unique_name)
+    assert second.status_code == 201
+    assert second.headers["idempotent-replayed"] == "true"
+    assert second.json() == first.json()
+    assert create_calls == [unique_name]
+
+
+def test_same_key_with_different_body_returns_422(client, key, unique_name):
+    assert _register(client, key, unique_name).status_code == 201
+    assert _register(client, key, unique_name, password="other").status_code == 422
+
+
+def test_pending_key_returns_409(client, key, unique_name, create_calls):
+    # 模拟另一个worker正在处理同一个键
+    payload = schemas.UserCreate(username=unique_name, password="secret")
+    guard = idempotency.IdempotencyGuard(key, "register", payload).__enter__()
+    try:
+        assert _register(client, key, unique_name).status_code == 409
+        assert create_calls == []
+    finally:
+        guard.__exit__(None, None, None)
+    assert _register(client, key, unique_name).status_code == 201
+
+
+def test_key_released_after_username_conflict(client, key, unique_name):
+    assert client.post("/users/register", json={"username": unique_name, "password": "secret"}).status_code == 201
+    assert _register(client, key, unique_name).status_code == 409
+    assert idempotency._store().get(f"register:{key}") is None
+    # 键已释放，可以用于不同的请求体
+    assert _register(client, key, unique_name + "_b").status_code == 201
+
+
+def test_key_released_after_rollback(client, key, unique_name, monkeypatch):
+    original_save = idempotency.IdempotencyGuard.save
+
+    def failing_save(self, db, status_code, body):
+        # 响应已登记，但请求随后失败，事务回滚
+        original_save(self, db, status_code, body)
+        raise HTTPException(status_code=503, detail="unavailable")
+
+    monkeypatch.setattr(idempotency.IdempotencyGuard, "save", failing_save)
+    assert _register(client, key, unique_name).status_code == 503
+    assert idempotency._store().get(f"register:{key}") is None
+
+    monkeypatch.setattr(idempotency.IdempotencyGuard, "save", original_save)
+    response = _register(client, key, unique_name)
+    assert response.status_code == 201
+    assert "idempotent-replayed" not in response.headers
@@ -0,0 +1,45 @@
+import logging
+import sqlite3
+import threading
+import time
+
+import httpx
+
+from app import audit
+
+
+def test_shutdown_flushes_session_last_seen(run_server):
+    # 会话最后活跃时间只在内存中累积，只有关闭时的刷新会写入数据库
+    base_url, db_path = run_server(workers=2, SESSION_FLUSH_SECONDS="3600")
+    with httpx.Client(base_url=base_url) as http:
+        token = http.post("/users/login", json={"username": "admin", "password": "admin123"}).json()["access_token"]
+        assert http.get("/users/me", headers={"Authorization": f"Bearer {token}"}).status_code == 200
+
+    run_server.stop()
+
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute("SELECT last_seen FROM user_sessions").fetchall()
+    assert rows and all(last_seen is not None for (last_seen,) in rows)
+
+
+def test_stop_gives_up_on_a_stuck_thread(monkeypatch, caplog):
+    release = threading.Event()
+    entered = threading.Event()
+
+    def stuck():
+        entered.set()
+        release.wait()
+        return []
+
+    monkeypatch.setattr(audit, "maintain_partitions", stuck)
+    maintainer = audit.PartitionMaintainer(interval=0.01)
+    maintainer.start()
+    try:
+        assert entered.wait(2)
+        started = time.monotonic()
+        with caplog.at_level(logging.WARNING, logger="app.audit"):
+            maintainer.stop(timeout=0.1)
+        assert time.monotonic() - started < 2
+        assert "did not stop within 0.1s" in caplog.text
+    finally:
+        release.set()
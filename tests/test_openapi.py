@@ -0,0 +1,41 @@
+import pytest
+
+
+@pytest.mark.parametrize("accept_encoding, compressed", [
+    ("gzip", True),
+    ("br, gzip;q=0.5", True),
+    ("*", True),
+    ("gzip;q=0", False),
+    ("identity", False),
+    ("", False),
+])
+def test_openapi_gzip_negotiation(client, accept_encoding, compressed):
+    response = client.get("/openapi.json", headers={"Accept-Encoding": accept_encoding})
+    assert response.status_code == 200
+    assert (response.headers.get("content-encoding") == "gzip") == compressed
+    # httpx 会自动解压，无论是否压缩都应得到完整文档
+    assert "/users/register" in response.json()["paths"]
+
+
+def test_openapi_etag_not_modified(client):
+    etag = client.get("/openapi.json", headers={"Accept-Encoding": "identity"}).headers["etag"]
+    for if_none_match in (etag, f'"other", W/{etag}', "*"):
+        response = client.get(
+            "/openapi.json", headers={"Accept-Encoding": "identity", "If-None-Match": if_none_match}
+        )
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+    response = client.get("/openapi.json", headers={"Accept-Encoding": "identity", "If-None-Match": '"other"'})
+    assert response.status_code == 200
+
+
+def test_openapi_etag_differs_per_encoding(client):
+    identity_etag = client.get("/openapi.json", headers={"Accept-Encoding": "identity"}).headers["etag"]
+    gzip_etag = client.get("/openapi.json", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+    assert identity_etag != gzip_etag
+    # 客户端缓存的是未压缩版本，改为接受gzip时应返回完整响应
+    response = client.get("/openapi.json", headers={"Accept-Encoding": "gzip", "If-None-Match": identity_etag})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    response = client.get("/openapi.json", headers={"Accept-Encoding": "gzip", "If-None-Match": gzip_etag})
+    assert response.status_code == 304
@@ -0,0 +1,80 @@
+import sqlite3
+import uuid
+
+import pytest
+
+from app import database, models, state
+
+
+@pytest.fixture
+def replica(client, tmp_path, monkeypatch):
+    """把主库复制到第二个SQLite文件作为只读副本，并额外写入一个只存在于副本的用户"""
+    path = tmp_path / "replica.db"
+    with database.engine.connect() as conn:
+        target = sqlite3.connect(path)
+        conn.connection.driver_connection.backup(target)
+        target.close()
+
+    replica_engine = database._create_engine(f"sqlite:///{path}")
+    marker = f"replica_{uuid.uuid4().hex[:8]}"
+    with replica_engine.begin() as conn:
+        conn.execute(models.User.__table__.insert().values(
+            id=str(uuid.uuid4()), username=marker, hashed_password="x", is_active=True,
+        ))
+
+    monkeypatch.setattr(database, "replica_engine", replica_engine)
+    state.get_store().delete(database._sticky_key("admin"))
+    yield marker
+    state.get_store().delete(database._sticky_key("admin"))
+    replica_engine.dispose()
+
+
+def _role_names(client, headers):
+    response = client.get("/roles", params={"limit": 1000}, headers=headers)
+    assert response.status_code == 200
+    return {role["name"] for role in response.json()}
+
+
+def test_get_requests_read_from_replica(client, admin_headers, replica):
+    response = client.get("/users/admin/users", params={"limit": 1000}, headers=admin_headers)
+    assert response.status_code == 200
+    assert replica in {user["username"] for user in response.json()["users"]}
+
+
+def test_write_requests_use_primary(client, admin_headers, replica, unique_name):
+    response = client.post("/roles", json={"name": unique_name}, headers=admin_headers)
+    assert response.status_code == 201
+    with database.engine.connect() as conn:
+        names = {row.name for row in conn.execute(models.Role.__table__.select())}
+    assert unique_name in names
+
+
+def test_reads_stick_to_primary_after_write(client, admin_headers, replica, unique_name):
+    assert client.post("/roles", json={"name": unique_name}, headers=admin_headers).status_code == 201
+    # 副本中没有刚创建的角色，能读到说明这次读请求走了主库
+    assert unique_name in _role_names(client, admin_headers)
+
+
+def test_sticky_window_zero_disables_stickiness(client, admin_headers, replica, unique_name, monkeypatch):
+    monkeypatch.setattr(database, "REPLICA_STICKY_SECONDS", 0)
+    assert client.post("/roles", json={"name": unique_name}, headers=admin_headers).status_code == 201
+    assert state.get_store().get(database._sticky_key("admin")) is None
+    assert unique_name not in _role_names(client, admin_headers)
+
+
+def test_local_store_zero_ttl_expires_immediately():
+    store = state.LocalStore()
+    store.set("key", 1, ttl=0)
+    assert store.get("key") is None
+    store.set("key", 1)
+    assert store.get("key") == 1
+
+
+def test_signup_flow_reads_own_writes_on_stale_replica(client, replica, unique_name):
+    # 副本快照早于注册，新用户只存在于主库
+    response = client.post("/users/register", json={"username": unique_name, "password": "secret"})
+    assert response.status_code == 201
+    token = client.post("/users/login", json={"username": unique_name, "password": "secret"}).json()["access_token"]
+    response = client.get("/users/me", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert response.json()["username"] == unique_name
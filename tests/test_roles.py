@@ -0,0 +1,27 @@
+def test_create_duplicate_role_returns_409(client, admin_headers, unique_name):
+    assert client.post("/roles", json={"name": unique_name}, headers=admin_headers).status_code == 201
+    response = client.post("/roles", json={"name": unique_name}, headers=admin_headers)
+    assert response.status_code == 409
+
+
+def test_rename_role_to_existing_name_returns_409(client, admin_headers, unique_name):
+    first = client.post("/roles", json={"name": unique_name}, headers=admin_headers).json()
+    assert client.post("/roles", json={"name": unique_name + "_b"}, headers=admin_headers).status_code == 201
+    response = client.put(f"/roles/{first['id']}", json={"name": unique_name + "_b"}, headers=admin_headers)
+    assert response.status_code == 409
+    assert client.get(f"/roles/{first['id']}", headers=admin_headers).json()["name"] == unique_name
+
+
+def test_rename_builtin_role_is_rejected(client, admin_headers):
+    roles = client.get("/roles", headers=admin_headers).json()
+    user_role = next(role for role in roles if role["name"] == "user")
+    response = client.put(f"/roles/{user_role['id']}", json={"name": "renamed"}, headers=admin_headers)
+    assert response.status_code == 400
+
+
+def test_duplicate_permission_returns_409(client, admin_headers, unique_name):
+    first = client.post("/permissions", json={"name": unique_name}, headers=admin_headers).json()
+    assert client.post("/permissions", json={"name": unique_name}, headers=admin_headers).status_code == 409
+    assert client.post("/permissions", json={"name": unique_name + "_b"}, headers=admin_headers).status_code == 201
+    response = client.put(f"/permissions/{first['id']}", json={"name": unique_name + "_b"}, headers=admin_headers)
+    assert response.status_code == 409
@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import auth, models, sessions
+from app.database import SessionLocal
+
+
+@pytest.fixture
+def user(client, login, unique_name):
+    """注册用户并登录两次，返回 (用户id, [请求头], 管理接口路径)"""
+    response = client.post("/users/register", json={"username": unique_name, "password": "secret"})
+    assert response.status_code == 201
+    user_id = response.json()["id"]
+    headers = [login(unique_name, "secret"), login(unique_name, "secret")]
+    return user_id, headers, f"/users/admin/users/{user_id}/sessions"
+
+
+def _sessions(client, admin_headers, path):
+    response = client.get(path, headers=admin_headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def _jti(headers):
+    return auth.verify_token(headers["Authorization"].split(" ", 1)[1])["jti"]
+
+
+def test_list_sessions_merges_unflushed_last_seen(client, admin_headers, user):
+    _, headers, path = user
+    assert client.get("/users/me", headers=headers[0]).status_code == 200
+
+    listed = {item["jti"]: item for item in _sessions(client, admin_headers, path)}
+    assert set(listed) == {_jti(item) for item in headers}
+    # 最后活跃时间还在内存中，没有写入数据库
+    seen = sessions.registry.pending_last_seen(_jti(headers[0]))
+    assert seen is not None
+    assert datetime.fromisoformat(listed[_jti(headers[0])]["last_seen"]) == seen
+    assert listed[_jti(headers[1])]["last_seen"] is None
+
+
+def test_revoke_one_session(client, admin_headers, user):
+    _, headers, path = user
+    jti = _jti(headers[1])
+
+    assert client.delete(f"{path}/{jti}", headers=admin_headers).status_code == 200
+    assert client.get("/users/me", headers=headers[1]).status_code == 401
+    assert client.get("/users/me", headers=headers[0]).status_code == 200
+    assert client.delete(f"{path}/{jti}", headers=admin_headers).status_code == 404
+    assert client.delete(f"{path}/unknown", headers=admin_headers).status_code == 404
+    assert {item["jti"]: item["revoked"] for item in _sessions(client, admin_headers, path)}[jti] is True
+
+
+def test_revoke_all_sessions(client, admin_headers, user):
+    _, headers, path = user
+    response = client.delete(path, headers=admin_headers)
+    assert response.status_code == 200
+    assert response.json()["revoked"] == 2
+    for item in headers:
+        assert client.get("/users/me", headers=item).status_code == 401
+    assert all(item["revoked"] for item in _sessions(client, admin_headers, path))
+
+
+def test_revocation_is_published_only_after_commit(user):
+    user_id, _, _ = user
+    with SessionLocal() as db:
+        jtis = [row.jti for row in db.query(models.UserSession.jti).filter(models.UserSession.user_id == user_id)]
+        assert sessions.revoke_sessions(db, [user_id]) == 2
+        assert not any(sessions.is_revoked(jti) for jti in jtis)
+        db.rollback()
+        assert not any(sessions.is_revoked(jti) for jti in jtis)
+
+        assert sessions.revoke_sessions(db, [user_id]) == 2
+        db.commit()
+    assert all(sessions.is_revoked(jti) for jti in jtis)
+
+
+def test_failed_flush_keeps_pending_updates(monkeypatch):
+    registry = sessions.SessionRegistry(flush_interval=3600)
+    older = datetime.utcnow() - timedelta(minutes=5)
+    newer = datetime.utcnow()
+    registry._pending = {"a": older, "b": older}
+
+    class FailingEngine:
+        def begin(self):
+            # 模拟写入期间"b"又有新的活跃时间
+            registry._pending["b"] = newer
+            raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(sessions, "engine", FailingEngine())
+    with pytest.raises(RuntimeError):
+        registry.flush()
+    assert registry._pending == {"a": older, "b": newer}
@@ -0,0 +1,34 @@
+import time
+
+from app.state import LocalStore
+
+
+def test_bounded_store_evicts_least_recently_used():
+    store = LocalStore(max_entries=2)
+    store.set("a", 1)
+    store.set("b", 2)
+    # 读取 a 后 b 成为最久未使用的键
+    assert store.get("a") == 1
+    store.set("c", 3)
+    assert store.get("a") == 1
+    assert store.get("b") is None
+    assert store.get("c") == 3
+
+
+def test_expired_keys_are_swept_on_write():
+    store = LocalStore(sweep_interval=0)
+    for i in range(100):
+        store.set(f"revoked:{i}", True, ttl=0.01)
+    time.sleep(0.02)
+    store.set("other", 1)
+    assert len(store._data) == 1
+
+
+def test_add_and_incr_respect_expiry():
+    store = LocalStore()
+    assert store.add("key", 1, ttl=0.01)
+    assert not store.add("key", 2)
+    time.sleep(0.02)
+    assert store.add("key", 3)
+    assert store.incr("counter") == 1
+    assert store.incr("counter", 2) == 3
@@ -0,0 +1,123 @@
+import contextlib
+
+import pytest
+from sqlalchemy import event
+
+from app import database
+from app.role_catalog import catalog
+
+
+@contextlib.contextmanager
+def count_statements():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(database.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(database.engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture(autouse=True)
+def warm_catalog(client):
+    # 其他测试修改角色后目录缓存会失效，先加载，避免把重新加载的查询计入
+    with database.SessionLocal() as db:
+        catalog.load(db)
+
+
+@pytest.fixture
+def user(client, login, unique_name):
+    response = client.post("/users/register", json={"username": unique_name, "password": "secret"})
+    assert response.status_code == 201
+    return {"id": response.json()["id"], "headers": login(unique_name, "secret")}
+
+
+# 每个写接口一次请求内执行的SQL语句数（不含 BEGIN/COMMIT），包括认证查询和构造响应时加载的关联。
+# 数字变大说明引入了多余的查询或提交后的重新加载，应先确认原因再更新这里
+def test_register(client, unique_name):
+    with count_statements() as statements:
+        response = client.post("/users/register", json={"username": unique_name, "password": "secret"})
+    assert response.status_code == 201
+    # 按主键取user角色、INSERT users RETURNING、INSERT user_role、写日志、响应中的角色权限
+    assert len(statements) == 5, statements
+
+
+def test_login(login, user, unique_name):
+    with count_statements() as statements:
+        login(unique_name, "secret")
+    # 查询用户、写日志、响应中的角色和权限、INSERT user_sessions RETURNING
+    assert len(statements) == 5, statements
+
+
+def test_update_me(client, user, unique_name):
+    with count_statements() as statements:
+        response = client.put("/users/me", json={"username": unique_name + "x"}, headers=user["headers"])
+    assert response.status_code == 200
+    # 查询当前用户、UPDATE users、写日志、响应中的角色和权限
+    assert len(statements) == 5, statements
+
+
+def test_change_password(client, user):
+    with count_statements() as statements:
+        response = client.put(
+            "/users/me/password",
+            json={"old_password": "secret", "new_password": "secret2"},
+            headers=user["headers"],
+        )
+    assert response.status_code == 200
+    # 查询当前用户、写日志、UPDATE users
+    assert len(statements) == 3, statements
+
+
+def test_admin_create(client, admin_headers, unique_name):
+    with count_statements() as statements:
+        response = client.post(
+            "/users/admin/users", json={"username": unique_name, "password": "secret"}, headers=admin_headers
+        )
+    assert response.status_code == 201
+    # 查询管理员及其角色、按主键取user角色、INSERT users RETURNING、INSERT user_role、写日志、响应中的角色权限
+    assert len(statements) == 7, statements
+
+
+def test_admin_update(client, admin_headers, user):
+    with count_statements() as statements:
+        response = client.put(f"/users/admin/users/{user['id']}", json={"is_active": False}, headers=admin_headers)
+    assert response.status_code == 200
+    # 查询管理员及其角色、查询用户、UPDATE users、查询并吊销会话、写日志、响应中的角色和权限
+    assert len(statements) == 9, statements
+
+
+def test_admin_delete(client, admin_headers, user):
+    with count_statements() as statements:
+        response = client.delete(f"/users/admin/users/{user['id']}", headers=admin_headers)
+    assert response.status_code == 200
+    # 查询管理员及其角色、查询用户及其角色、DELETE user_role、DELETE users、查询并吊销会话、写日志
+    assert len(statements) == 9, statements
+
+
+def test_batch_deactivate(client, admin_headers, user):
+    with count_statements() as statements:
+        response = client.post(
+            "/users/admin/users/batch/deactivate", json={"user_ids": [user["id"]]}, headers=admin_headers
+        )
+    assert response.status_code == 200
+    # 查询管理员及其角色、解析目标用户、UPDATE users、查询并吊销会话、写日志（一次executemany）
+    assert len(statements) == 7, statements
+
+
+def test_write_request_commits_once(client, admin_headers, user):
+    commits = []
+
+    def on_commit(conn):
+        commits.append(conn)
+
+    event.listen(database.engine, "commit", on_commit)
+    try:
+        response = client.put(f"/users/admin/users/{user['id']}", json={"is_active": False}, headers=admin_headers)
+    finally:
+        event.remove(database.engine, "commit", on_commit)
+    assert response.status_code == 200
+    assert len(commits) == 1
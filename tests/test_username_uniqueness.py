@@ -0,0 +1,75 @@
+import sqlite3
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+from sqlalchemy.exc import OperationalError
+
+from app import crud
+
+
+def _locked_error():
+    return OperationalError("INSERT INTO users", {}, sqlite3.OperationalError("database is locked"))
+
+
+def test_case_insensitive_lookup_matches_database_folding(client, login, monkeypatch):
+    monkeypatch.setattr(crud, "USERNAME_CASE_INSENSITIVE", True)
+    suffix = uuid.uuid4().hex[:8]
+    for username, login_as in ((f"Ärger_{suffix}", f"Ärger_{suffix}"), (f"MiXed_{suffix}", f"mixed_{suffix}")):
+        response = client.post("/users/register", json={"username": username, "password": "secret"})
+        assert response.status_code == 201
+        headers = login(login_as, "secret")
+        assert client.get("/users/me", headers=headers).json()["username"] == username
+
+
+def test_busy_database_is_retried(client, unique_name, monkeypatch):
+    create_user = crud.create_user
+    calls = []
+
+    def flaky_create_user(db, user):
+        calls.append(user.username)
+        if len(calls) == 1:
+            raise _locked_error()
+        return create_user(db, user)
+
+    monkeypatch.setattr(crud, "create_user", flaky_create_user)
+    response = client.post("/users/register", json={"username": unique_name, "password": "secret"})
+    assert response.status_code == 201
+    assert len(calls) == 2
+
+
+def test_busy_database_returns_503_after_retries(client, unique_name, monkeypatch):
+    def locked(db, user):
+        raise _locked_error()
+
+    monkeypatch.setattr(crud, "create_user", locked)
+    response = client.post("/users/register", json={"username": unique_name, "password": "secret"})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+
+def test_parallel_registrations_create_no_duplicates(run_server):
+    """数百个并发注册请求（30个用户名，每个10次）：每个用户名只成功一次，没有500"""
+    base_url, db_path = run_server(workers=4)
+    prefix = uuid.uuid4().hex[:8]
+    usernames = [f"stress_{prefix}_{i}" for i in range(30)] * 10
+
+    def register(username):
+        with httpx.Client(base_url=base_url, timeout=120) as http:
+            response = http.post("/users/register", json={"username": username, "password": "secret"})
+        return username, response.status_code
+
+    with ThreadPoolExecutor(max_workers=100) as pool:
+        results = list(pool.map(register, usernames))
+
+    statuses = Counter(status for _, status in results)
+    assert set(statuses) <= {201, 409, 503}, statuses
+    created = Counter(username for username, status in results if status == 201)
+    assert all(count == 1 for count in created.values()), created
+    if 503 not in statuses:
+        assert set(created) == set(usernames)
+
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute("SELECT username FROM users WHERE username LIKE ?", (f"stress_{prefix}_%",)).fetchall()
+    assert Counter(username for (username,) in rows) == created